@@ -7,6 +7,7 @@
 @Description: 
 """
 import os
+from decimal import Decimal
 
 from dotenv import load_dotenv
 from solders.keypair import Keypair
@@ -18,6 +19,12 @@ load_dotenv()
 class Settings:
     # --- 基础配置 ---
     RPC_URL = os.getenv("RPC_URL", "https://api.mainnet-beta.solana.com")
+    # Solana RPC WebSocket 地址：配置后主循环按 slotSubscribe 推送的新 slot 触发扫描，不配置则按固定间隔轮询
+    WSS_URL = os.getenv("WSS_URL", "").strip()
+    # slot 驱动扫描的最小间隔（秒），避免按 ~400ms 出块频率打满 Jupiter 限流
+    SCAN_MIN_INTERVAL_SEC = float(os.getenv("SCAN_MIN_INTERVAL_SEC", "1.0"))
+    # 超过该时间未收到新 slot（推送中断）时照常扫描
+    SLOT_WAIT_TIMEOUT_SEC = 20.0
     ENV = os.getenv("ENV", "DEV")
 
     # --- 核心: Jupiter API (V1) ---
@@ -31,6 +38,36 @@ class Settings:
     # 兼容旧配置：若无 JUPITER_API_KEYS，则使用 JUPITER_API_KEY
     if not JUPITER_API_KEYS and os.getenv("JUPITER_API_KEY"):
         JUPITER_API_KEYS = [os.getenv("JUPITER_API_KEY").strip()]
+    # Jupiter 全局同时在途请求上限（同时也是 HTTP 连接池上限），超出的请求排队等待
+    MAX_JUPITER_INFLIGHT = int(os.getenv("MAX_JUPITER_INFLIGHT", "16"))
+    # 每个 API Key 同时在途的请求上限；并发询价按空闲槽位分配到各 Key
+    JUPITER_MAX_INFLIGHT_PER_KEY = int(os.getenv("JUPITER_MAX_INFLIGHT_PER_KEY", "4"))
+    # Key 触发 429 后的冷却：首次 JUPITER_KEY_COOLDOWN_SEC，连续触发指数翻倍，最长 JUPITER_KEY_COOLDOWN_MAX_SEC
+    JUPITER_KEY_COOLDOWN_SEC = 2.0
+    JUPITER_KEY_COOLDOWN_MAX_SEC = 60.0
+    # 每个 Key 的令牌桶限速：每秒 JUPITER_RPS 个请求、最多突发 JUPITER_BURST 个；0 表示不限速（只靠 429 冷却）
+    # 429 / 5xx 后该 Key 的令牌桶临时降速，之后自动恢复
+    JUPITER_RPS = float(os.getenv("JUPITER_RPS", "0"))
+    JUPITER_BURST = int(os.getenv("JUPITER_BURST", "5"))
+
+    # 询价批处理：窗口期内的 quote 请求合并为一批并发发出，批内相同请求只发一次
+    # QUOTE_BATCH_WINDOW_MS=0 表示只收集同一轮事件循环内发起的请求，不额外增加延迟
+    QUOTE_BATCH_WINDOW_MS = float(os.getenv("QUOTE_BATCH_WINDOW_MS", "0"))
+    QUOTE_BATCH_MAX = 8
+    # 单次询价最多尝试次数（含首次）；仅网络异常 / 429 / 5xx 重试
+    QUOTE_MAX_ATTEMPTS = 2
+    # 单腿询价总超时（秒，含排队与重试），超时视为该腿询价失败，避免一腿卡住拖住整轮扫描
+    QUOTE_TIMEOUT_SEC = 20.0
+    # 询价短 TTL 缓存：相同 (input, output, amount) 在 TTL 内直接复用；0 表示关闭
+    # 单轮扫描内同一腿的并发请求已由 QuoteBatcher 合并，缓存只在相邻两轮扫描之间命中，故默认 TTL 取
+    # SCAN_MIN_INTERVAL_SEC + 500ms（覆盖等待新 slot 的抖动）：命中的一轮少发一半重复腿询价，代价是该轮报价最多旧
+    # ~1.5s，只会漏报/晚一轮发现机会；缓存结果显示有利润时会绕过缓存重新确认，不会按旧报价下单。
+    # 未配置 WSS_URL 时轮询间隔 10~20s，缓存不会命中
+    QUOTE_CACHE_TTL_MS = float(os.getenv("QUOTE_CACHE_TTL_MS", str(SCAN_MIN_INTERVAL_SEC * 1000 + 500)))
+    QUOTE_CACHE_MAX = 1024
+
+    # 推测询价容忍度：并发询价时第 2 腿起按上一轮比例预估投入量，预估与真实投入偏差超过该比例则按真实值重新询价
+    SPECULATIVE_QUOTE_TOLERANCE = 0.005
 
     # --- 代币地址 (常量) ---
     # 路径中出现的代币必须在 settings 中配置 XX_MINT，否则会报错
@@ -45,6 +82,13 @@ class Settings:
     ARB_PATH = [s.strip().upper() for s in _arb_path_raw.split(",") if s.strip()]
     if not ARB_PATH or ARB_PATH[0] != "USDC" or ARB_PATH[-1] != "USDC":
         ARB_PATH = ["USDC", "SOL", "USDC"]  # 默认
+    # 并发扫描的多条路径（分号分隔），取净利润最高者执行；示例 .env: ARB_PATHS=USDC,SOL,USDC;USDC,JUP,USDC
+    # 未配置时只扫描 ARB_PATH
+    _arb_paths_raw = os.getenv("ARB_PATHS", "")
+    ARB_PATHS = [
+        p for p in ([s.strip().upper() for s in seg.split(",") if s.strip()] for seg in _arb_paths_raw.split(";"))
+        if len(p) >= 2 and p[0] == "USDC" and p[-1] == "USDC"
+    ] or [ARB_PATH]
 
     @staticmethod
     def get_mint(symbol: str) -> str:
@@ -57,12 +101,19 @@ class Settings:
             raise ValueError(f"未配置 {sym}_MINT，请在 config/settings.py 或 .env 中配置该代币的 mint 地址")
         return mint
 
+    # --- 日志 ---
+    # 控制台与日志文件的最低级别；每轮扫描的过程日志为 DEBUG，排查时可设 LOG_LEVEL=DEBUG
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+
     # --- 精度换算 ---
     LAMPORT_PER_SOL = 1_000_000_000
     UNITS_PER_USDC = 1_000_000
 
     # 每次交易的USDC数量
     AMOUNT_USDC = 100
+    # 并发探测的投入金额档位 (USDC)，取净利润最高的一档执行；示例 .env: AMOUNT_USDC_GRID=100,250,500
+    # 未配置时只探测 AMOUNT_USDC；各档金额须在钱包 USDC 余额之内
+    AMOUNT_USDC_GRID = [float(x) for x in os.getenv("AMOUNT_USDC_GRID", "").split(",") if x.strip()] or [AMOUNT_USDC]
 
     # --- ⚡️ 成本与风控配置 (你的核心要求) ---
     # 1. 假定 SOL 价格 (用于快速计算 Gas 和 小费成本)
@@ -75,6 +126,8 @@ class Settings:
     # 3. Jito 贿赂费 (起步给 0.0001 SOL, 约 $0.02 - $0.1)
     # 如果抢不到单，可以适当调高这个值 (比如 0.001)
     JITO_TIP_AMOUNT_SOL = 0.0001
+    # 按十进制精确换算为 lamports（0.0001 无法用 float 精确表示，避免乘 10**9 后截断掉 1 lamport）
+    JITO_TIP_LAMPORTS = int(Decimal(str(JITO_TIP_AMOUNT_SOL)) * LAMPORT_PER_SOL)
 
     # 4. 最低净利润要求 (USDC)
     # 只有当 (预期利润 - 交易成本 - 贿赂成本) > 这个值，才开火
@@ -98,6 +151,15 @@ class Settings:
         ]
     JITO_ENGINE_URL = JITO_ENGINE_URLS[0]  # 兼容旧代码
 
+    # blockhash 缓存：链上有效约 60~90 秒。JitoClient 后台每 BLOCKHASH_REFRESH_INTERVAL_SEC 秒刷新一次，
+    # 缓存超过 BLOCKHASH_CACHE_TTL_SEC 未刷新（如后台刷新失败）则 send_bundle 现取
+    BLOCKHASH_REFRESH_INTERVAL_SEC = 20.0
+    BLOCKHASH_CACHE_TTL_SEC = 30.0
+
+    # 发送前逐笔复检 vote 程序未被锁为 writable（反编译阶段已强制 readonly，仅调试时开启）
+    # 示例 .env: DEBUG_VALIDATE_VOTE_ACCOUNTS=true
+    DEBUG_VALIDATE_VOTE_ACCOUNTS = os.getenv("DEBUG_VALIDATE_VOTE_ACCOUNTS", "false").strip().lower() in ("1", "true", "yes")
+
     # Jito 官方小费账户 (仅保留可解析为 Pubkey 的，避免 Invalid Base58)
     _JITO_TIP_ACCOUNTS_RAW = [
         "96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5",
@@ -7,7 +7,14 @@
 @Description: 
 """
 import asyncio
+import contextlib
 import random
+import sys
+
+try:
+    import uvloop  # libuv 事件循环，降低每次 await / socket 调度开销；未安装（如 Windows）时用默认事件循环
+except ImportError:
+    uvloop = None
 
 import httpx
 from loguru import logger
@@ -18,6 +25,7 @@ from config.settings import settings
 from src.ata_utils import ensure_atas_for_path, get_ata_address, ata_exists, ensure_ata_exists
 from src.jito_client import JitoClient
 from src.jupiter import JupiterClient
+from src.slot_stream import SolanaSlotStream
 
 
 def patch_httpx_verify():
@@ -32,8 +40,10 @@ def patch_httpx_verify():
 
 patch_httpx_verify()
 
-# 配置日志
-logger.add("logs/jup_scout_trade.log", rotation="10 MB")
+# 配置日志（默认 INFO：热路径上的 debug 日志不做格式化）
+logger.remove()
+logger.add(sys.stderr, level=settings.LOG_LEVEL)
+logger.add("logs/jup_scout_trade.log", rotation="10 MB", level=settings.LOG_LEVEL)
 
 
 async def main():
@@ -45,97 +55,100 @@ async def main():
         return
     logger.info(f"👤 交易员: {settings.PUB_KEY}")
 
-    # 2. 初始化客户端
-    jup_client = JupiterClient()
-    jito_client = JitoClient()
-
-    # 3. 设定投入金额
-    amount_usdc = settings.AMOUNT_USDC
-    amount_lamports = int(amount_usdc * settings.UNITS_PER_USDC)
-
-    logger.info(f"💵 每次投入: {amount_usdc} USDC")
-    logger.info(f"🛑 最低净利要求: ${settings.MIN_NET_PROFIT_USDC}")
-    logger.info(f"🛡️ 成本估算基准: SOL = ${settings.FIXED_SOL_PRICE_USDC}")
-    path_str = " -> ".join(settings.ARB_PATH)
-    logger.info(f"🛤️ 套利路径: {path_str}")
-    try:
-        for s in settings.ARB_PATH:
-            settings.get_mint(s)
-    except ValueError as e:
-        logger.error(f"❌ 路径代币配置错误: {e}")
-        return
-    if settings.JUPITER_API_KEYS:
-        logger.info(f"🔑 Jupiter API Key 池: {len(settings.JUPITER_API_KEYS)} 个")
-    if len(settings.JITO_ENGINE_URLS) > 1:
-        logger.info(f"🌐 Jito 端点池: {len(settings.JITO_ENGINE_URLS)} 个")
-
-    # Stage 0：账户准备，确保路径上所有 ATA 常驻（USDC、wSOL、中间 token）
-    logger.info("🛠️ Stage 0: 确保路径 ATA 存在...")
-    try:
-        path_mints = [Pubkey.from_string(settings.get_mint(s)) for s in settings.ARB_PATH]
-        async with AsyncClient(settings.RPC_URL) as rpc:
-            await ensure_atas_for_path(rpc, settings.KEYPAIR, path_mints)
-    except Exception as e:
-        logger.warning(f"⚠️ Stage 0 部分失败（可继续运行）: {e}")
-    logger.info("✅ Stage 0 完成")
-
-    # --- 死循环：开始持续巡逻 ---
-    while True:
+    # 2. 初始化客户端（长连接，整个运行期间复用，退出时关闭）
+    # 配置 WSS_URL 时按新 slot 触发扫描，否则按固定间隔轮询
+    slot_stream_ctx = SolanaSlotStream(
+        settings.WSS_URL,
+        min_interval_sec=settings.SCAN_MIN_INTERVAL_SEC,
+        max_wait_sec=settings.SLOT_WAIT_TIMEOUT_SEC,
+    ) if settings.WSS_URL else contextlib.nullcontext()
+    async with JupiterClient() as jup_client, JitoClient() as jito_client, slot_stream_ctx as slot_stream:
+        # 3. 设定投入金额（多档时并发探测，取净利润最高的一档）
+        amount_grid = [int(a * settings.UNITS_PER_USDC) for a in settings.AMOUNT_USDC_GRID]
+
+        logger.info(f"💵 每次投入: {' / '.join(str(a) for a in settings.AMOUNT_USDC_GRID)} USDC")
+        logger.info(f"🛑 最低净利要求: ${settings.MIN_NET_PROFIT_USDC}")
+        logger.info(f"🛡️ 成本估算基准: SOL = ${settings.FIXED_SOL_PRICE_USDC}")
+        for arb_path in settings.ARB_PATHS:
+            logger.info(f"🛤️ 套利路径: {' -> '.join(arb_path)}")
         try:
-            # 限流冷却期间不扫描，直接等待冷却结束
-            rate_limit_wait = jito_client.get_rate_limit_wait_seconds()
-            if rate_limit_wait > 0:
-                logger.info(f"⏳ Jito 冷却中，剩余 {rate_limit_wait} 秒，暂停扫描...")
-                await asyncio.sleep(min(rate_limit_wait, 5))  # 每5秒检查一次，避免长时间阻塞
-                continue
-
-            path_str = " -> ".join(settings.ARB_PATH)
-            logger.info(f"🔎 正在扫描闭环套利机会 ({path_str})...")
-
-            # 使用check_arb_opportunity方法检查套利机会
-            arb_result = await jup_client.check_arb_opportunity(amount_lamports)
+            for arb_path in settings.ARB_PATHS:
+                for s in arb_path:
+                    settings.get_mint(s)
+        except ValueError as e:
+            logger.error(f"❌ 路径代币配置错误: {e}")
+            return
+        if settings.JUPITER_API_KEYS:
+            logger.info(f"🔑 Jupiter API Key 池: {len(settings.JUPITER_API_KEYS)} 个")
+        if len(settings.JITO_ENGINE_URLS) > 1:
+            logger.info(f"🌐 Jito 端点池: {len(settings.JITO_ENGINE_URLS)} 个")
+
+        # Stage 0：账户准备，确保路径上所有 ATA 常驻（USDC、wSOL、中间 token）
+        logger.info("🛠️ Stage 0: 确保路径 ATA 存在...")
+        try:
+            path_symbols = dict.fromkeys(s for arb_path in settings.ARB_PATHS for s in arb_path)
+            path_mints = [Pubkey.from_string(settings.get_mint(s)) for s in path_symbols]
+            async with AsyncClient(settings.RPC_URL) as rpc:
+                await ensure_atas_for_path(rpc, settings.KEYPAIR, path_mints)
+        except Exception as e:
+            logger.warning(f"⚠️ Stage 0 部分失败（可继续运行）: {e}")
+        logger.info("✅ Stage 0 完成")
+
+        # --- 死循环：开始持续巡逻 ---
+        while True:
+            try:
+                # 限流冷却期间不扫描，直接等待冷却结束
+                rate_limit_wait = jito_client.get_rate_limit_wait_seconds()
+                if rate_limit_wait > 0:
+                    logger.info(f"⏳ Jito 冷却中，剩余 {rate_limit_wait} 秒，暂停扫描...")
+                    await asyncio.sleep(min(rate_limit_wait, 5))  # 每5秒检查一次，避免长时间阻塞
+                    continue
 
-            if not arb_result:
-                # 未发现套利机会或询价失败，等待后继续（随机延迟避免规律请求）
-                await asyncio.sleep(random.uniform(3, 6))  # 增加间隔以减少限流
-                continue
+                logger.debug("🔎 正在扫描闭环套利机会 ({} 条路径)...", len(settings.ARB_PATHS))
 
-            # 检查净利润是否满足最低要求
-            net_profit = arb_result['net_profit_usdc']
-            gross_profit = arb_result['gross_profit_usdc']
+                # 使用scan_grid并发检查各路径、各档投入金额的套利机会
+                arb_result = await jup_client.scan_grid(amount_grid, paths=settings.ARB_PATHS)
 
-            # 调试日志：显示详细的利润信息
-            logger.debug(f"📊 利润分析: 净利润=${net_profit:.6f}, 最低要求=${settings.MIN_NET_PROFIT_USDC:.6f}")
-            logger.debug(
-                f"   判断条件: net_profit > MIN_NET_PROFIT_USDC => {net_profit:.6f} > {settings.MIN_NET_PROFIT_USDC:.6f} = {net_profit > settings.MIN_NET_PROFIT_USDC}")
+                if not arb_result:
+                    # 利润不足或询价失败：slot 驱动时等下一个新 slot 再扫描，否则随机延迟避免规律请求
+                    if slot_stream is not None:
+                        await slot_stream.next_slot()
+                    else:
+                        await asyncio.sleep(random.uniform(10, 20))  # 增加间隔以减少限流
+                    continue
 
-            # 关键：只有净利润大于最低要求时才执行套利（确保不会亏损）
-            if net_profit > settings.MIN_NET_PROFIT_USDC:
-                logger.warning(f"🔥 发现套利机会! 净利润: ${net_profit:.4f} USDC (毛利: ${gross_profit:.4f} USDC)")
+                # check_arb_opportunity 仅在净利润超过 MIN_NET_PROFIT_USDC 时返回结果（确保不会亏损）
+                net_profit = arb_result['net_profit_usdc']
+                gross_profit = arb_result['gross_profit_usdc']
+                invest_usdc = arb_result['invest_usdc_units'] / settings.UNITS_PER_USDC
+                logger.warning(
+                    f"🔥 发现套利机会! 投入 {invest_usdc} USDC, 净利润: ${net_profit:.4f} USDC (毛利: ${gross_profit:.4f} USDC)")
 
                 quotes = arb_result["quotes"]
+                arb_path = arb_result["path"]
+                path_str = " -> ".join(arb_path)
                 logger.info(f"📦 构建原子套利交易 bundle ({path_str})...")
 
                 swap_txs = []
                 for idx, quote in enumerate(quotes):
-                    step_desc = f"{settings.ARB_PATH[idx]} -> {settings.ARB_PATH[idx + 1]}"
-                    swap_resp = await jup_client.get_swap_tx(quote)
-                    if not swap_resp:
+                    step_desc = f"{arb_path[idx]} -> {arb_path[idx + 1]}"
+                    swap_tx = await jup_client.get_swap_tx(quote)
+                    if not swap_tx:
                         logger.error(f"❌ 获取第 {idx + 1} 腿 swap 交易失败 ({step_desc})")
                         await asyncio.sleep(3)
                         swap_txs = None
                         break
-                    swap_txs.append(swap_resp["swapTransaction"])
+                    swap_txs.append(swap_tx)
 
                 if not swap_txs:
                     continue
 
                 # Stage 1：Quote 层。含 closeAccount 直接 reject；含 create ATA 则检查是否已有 ATA → 有则重新 quote，无则先 ensure 再重新 quote
                 need_requote = False
-                for idx, tx_b64 in enumerate(swap_txs):
-                    if not jup_client.swap_tx_has_ata_create_or_close(tx_b64):
+                for idx, swap_tx in enumerate(swap_txs):
+                    if not jup_client.swap_tx_has_ata_create_or_close(swap_tx):
                         continue
-                    mints = jup_client.swap_tx_ata_create_mints(tx_b64)
+                    mints = jup_client.swap_tx_ata_create_mints(swap_tx)
                     # closeAccount 无 mints，仍视为非 pure，直接 reject
                     if not mints:
                         logger.warning("🔄 Quote 含 closeAccount，reject（非 pure swap）")
@@ -157,21 +170,21 @@ async def main():
 
                 if need_requote:
                     # 重新 quote 一次，再检查是否变为 pure swap
-                    arb_result2 = await jup_client.check_arb_opportunity(amount_lamports)
-                    if not arb_result2 or arb_result2["net_profit_usdc"] <= settings.MIN_NET_PROFIT_USDC:
+                    arb_result2 = await jup_client.check_arb_opportunity(arb_result["invest_usdc_units"], path=arb_path)
+                    if not arb_result2:
                         await asyncio.sleep(random.uniform(2, 4))
                         continue
                     swap_txs = []
                     for quote in arb_result2["quotes"]:
-                        resp = await jup_client.get_swap_tx(quote)
-                        if not resp:
+                        swap_tx = await jup_client.get_swap_tx(quote)
+                        if not swap_tx:
                             swap_txs = None
                             break
-                        swap_txs.append(resp["swapTransaction"])
+                        swap_txs.append(swap_tx)
                     if not swap_txs:
                         continue
-                    for idx, tx_b64 in enumerate(swap_txs):
-                        if jup_client.swap_tx_has_ata_create_or_close(tx_b64):
+                    for swap_tx in swap_txs:
+                        if jup_client.swap_tx_has_ata_create_or_close(swap_tx):
                             logger.warning("❌ 重新 quote 后仍含 create ATA / closeAccount，跳过此机会")
                             swap_txs = None
                             break
@@ -228,15 +241,13 @@ async def main():
                 else:
                     logger.error("❌ Bundle提交失败")
                     await asyncio.sleep(random.uniform(5, 10))  # 增加间隔以减少限流
-            else:
-                # 利润不足，继续扫描（随机延迟避免规律请求）
-                logger.info(f"📉 利润不足，继续扫描... (净利润: ${net_profit:.4f} < ${settings.MIN_NET_PROFIT_USDC})")
-                await asyncio.sleep(random.uniform(10, 20))  # 增加间隔以减少限流
 
-        except Exception as e:
-            logger.error(f"主循环异常: {e}")
-            await asyncio.sleep(random.uniform(10, 15))  # 增加间隔以减少限流
+            except Exception as e:
+                logger.error(f"主循环异常: {e}")
+                await asyncio.sleep(random.uniform(10, 15))  # 增加间隔以减少限流
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
@@ -1,18 +1,24 @@
 # src/jito_client.py
-import base64
+import asyncio
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-import aiohttp
-import base58
+try:
+    import pybase64 as base64  # SIMD 加速的 base64 解码，接口与标准库一致；未安装时回退标准库
+except ImportError:
+    import base64
+
+import httpx
+import orjson
 from loguru import logger
 from solana.rpc.async_api import AsyncClient
 from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.hash import Hash
 from solders.instruction import Instruction, AccountMeta
 from solders.keypair import Keypair
 from solders.message import MessageV0
 from solders.pubkey import Pubkey
-from solders.system_program import transfer, TransferParams
 from solders.transaction import VersionedTransaction
 
 from config.settings import settings
@@ -24,6 +30,43 @@ SYSTEM_PROGRAM_ID = Pubkey.from_string("11111111111111111111111111111111")
 _ALT_META_SIZE = 56
 
 
+# Base58 编码（Jito sendBundle 要求）：逐位 divmod(58) 对 ~1.2KB 交易是上千次大整数除法，
+# 这里每次除以 58^80 取一大块，块内再按两位一组查表展开，大整数除法次数降为 1/80
+_B58_ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_PAIRS = [bytes((_B58_ALPHABET[lo], _B58_ALPHABET[hi])) for hi in range(58) for lo in range(58)]
+_B58_PAIRS_PER_CHUNK = 40
+_B58_CHUNK = 58 ** (2 * _B58_PAIRS_PER_CHUNK)
+
+
+def _b58encode(data: bytes) -> str:
+    stripped = data.lstrip(b"\0")
+    parts = []
+    i = int.from_bytes(stripped, "big")
+    while i:
+        i, r = divmod(i, _B58_CHUNK)
+        for _ in range(_B58_PAIRS_PER_CHUNK):
+            r, d = divmod(r, 58 * 58)
+            parts.append(_B58_PAIRS[d])
+    # parts 为低位在前：去掉块内高位补出的 '1' 后反转；前导 0 字节按约定编码为 '1'
+    encoded = b"".join(parts).rstrip(b"1")[::-1]
+    return "1" * (len(data) - len(stripped)) + encoded.decode("ascii")
+
+
+# bundle 序列化专用线程池：不与默认 executor 上的其他任务（DNS 解析等）争抢线程
+_SERIALIZE_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="jito-serialize")
+
+
+def _serialize_txs(signed_txs: list) -> list[str]:
+    """bytes(VersionedTransaction) 即 solders 标准序列化，再编码为 Jito Bundle 要求的 Base58"""
+    return [_b58encode(bytes(tx)) for tx in signed_txs]
+
+
+def _swap_tx_bytes(tx) -> bytes:
+    """SwapTx 直接复用其已解码的 bytes（Stage 1 扫描时已解码过），base64 字符串才在此解码"""
+    raw = getattr(tx, "raw", None)
+    return raw if raw is not None else base64.b64decode(tx)
+
+
 def _parse_alt_addresses(data: bytes) -> list:
     if len(data) < _ALT_META_SIZE + 4:
         return []
@@ -43,10 +86,8 @@ VOTE_PROGRAM_ID_STR = "Vote111111111111111111111111111111111111111"
 def tx_touches_vote_account(tx) -> bool:
     """提交前硬校验：交易是否触碰 Vote 程序（任一笔触碰则整包丢弃）。"""
     msg = getattr(tx.message, "value", tx.message)
-    for acc in msg.account_keys:
-        if str(acc) == VOTE_PROGRAM_ID_STR:
-            return True
-    return False
+    # 直接用 Pubkey 比较（list.__contains__ 走 C 层），避免逐个 str() 做 base58 编码
+    return VOTE_PROGRAM_ID in msg.account_keys
 
 
 def _is_vote_program(pubkey: Pubkey) -> bool:
@@ -71,7 +112,7 @@ async def _fetch_vote_account_set(rpc_client: AsyncClient, pubkeys: list) -> set
                     break
                 if acc is not None:
                     owner = getattr(acc, "owner", None)
-                    if owner is not None and bytes(owner) == bytes(VOTE_PROGRAM_ID):
+                    if owner is not None and owner == VOTE_PROGRAM_ID:
                         out.add(batch[i])
     except Exception as e:
         logger.debug(f"get_multiple_accounts 查询 vote owner 失败: {e}")
@@ -94,7 +135,7 @@ async def _fetch_alt_account(rpc_client: AsyncClient, lookup_table_pubkey: Pubke
 def _decompile_to_instructions(
         msg: MessageV0,
         full_account_keys: list,
-        is_writable_by_index: dict,
+        is_writable_by_index: list,
         vote_account_pubkeys: set = None,
 ) -> list:
     """将 MessageV0 反编译为 Instruction；归属 Vote 程序的 account 强制 readonly。"""
@@ -114,7 +155,8 @@ def _decompile_to_instructions(
                 continue
             account_key = full_account_keys[i]
             is_signer = msg.is_signer(i) if i < len_static and hasattr(msg, "is_signer") else False
-            is_writable = is_writable_by_index.get(i, False)
+            # is_writable_by_index 与 full_account_keys 逐位对应，上面已校验 i 越界
+            is_writable = is_writable_by_index[i]
             # 归属 Vote 程序的 account 或 Vote 程序本身一律只读，避免 Jito 报 vote account lock
             if _is_vote_program(account_key) or account_key in vote_account_pubkeys:
                 is_writable = False
@@ -124,44 +166,32 @@ def _decompile_to_instructions(
     return instructions
 
 
-def _to_index_list(val) -> list:
-    """将 writable_indexes/readonly_indexes 转为 index 列表，支持 bytes/list/tuple"""
-    if val is None:
-        return []
-    if isinstance(val, bytes):
-        return list(val)
-    if isinstance(val, (list, tuple)):
-        return list(val)
-    return []
-
-
 def _build_full_account_keys_and_alt_accounts(msg: MessageV0, alt_addresses_by_key: dict) -> tuple:
     """
     按 V0 顺序构建完整 account 列表，并构建 try_compile 所需的 AddressLookupTableAccount 列表。
     返回 (full_account_keys, address_lookup_table_accounts, is_writable_by_index)。
     """
     full_keys = list(msg.account_keys)
-    is_writable_by_index = {}
-    for i in range(len(msg.account_keys)):
-        is_writable_by_index[i] = msg.is_maybe_writable(i) if hasattr(msg, "is_maybe_writable") else False
+    # 按 full_keys 下标稠密排列，用 list 而非 dict，内层循环直接按位置取值
+    if hasattr(msg, "is_maybe_writable"):
+        is_writable_by_index = [msg.is_maybe_writable(i) for i in range(len(full_keys))]
+    else:
+        is_writable_by_index = [False] * len(full_keys)
     lookup_accounts = []
-    idx = len(msg.account_keys)
     for lookup in msg.address_table_lookups:
         key = lookup.account_key
         addresses = alt_addresses_by_key.get(key) or []
         lookup_accounts.append(AddressLookupTableAccount(key=key, addresses=addresses))
-        writable = _to_index_list(getattr(lookup, "writable_indexes", []) or [])
-        readonly = _to_index_list(getattr(lookup, "readonly_indexes", []) or [])
-        for i in writable:
-            if i < len(addresses):
+        n_addresses = len(addresses)
+        # solders 的 writable_indexes/readonly_indexes 为 bytes，直接按 int 迭代，无需拷贝成 list
+        for i in lookup.writable_indexes or b"":
+            if i < n_addresses:
                 full_keys.append(addresses[i])
-                is_writable_by_index[idx] = True
-                idx += 1
-        for i in readonly:
-            if i < len(addresses):
+                is_writable_by_index.append(True)
+        for i in lookup.readonly_indexes or b"":
+            if i < n_addresses:
                 full_keys.append(addresses[i])
-                is_writable_by_index[idx] = False
-                idx += 1
+                is_writable_by_index.append(False)
     return full_keys, lookup_accounts, is_writable_by_index
 
 
@@ -203,13 +233,83 @@ async def _rebuild_message_with_blockhash_async(rpc_client: AsyncClient, orig_me
         raise
 
 
+def _parse_tip_accounts(raw_accounts) -> list[Pubkey]:
+    """解析 tip 账户列表，跳过无法解析为 Base58 的条目（避免 Invalid Base58）"""
+    pubkeys = []
+    for raw in raw_accounts or []:
+        s = (raw or "").strip().replace("\ufeff", "").replace("\r", "").replace("\n", "")
+        if not s:
+            continue
+        try:
+            pubkeys.append(Pubkey.from_string(s))
+        except Exception:
+            continue
+    return pubkeys
+
+
 class JitoClient:
 
     def __init__(self):
         self.tip_amount = settings.JITO_TIP_AMOUNT_SOL
+        # tip 金额（settings 中已按 Decimal 换算为整数 lamports）与 tip 账户在启动时一次性解析，send_bundle 热路径只做 random.choice
+        self._tip_lamports = settings.JITO_TIP_LAMPORTS
+        self._tip_pubkeys: list[Pubkey] = _parse_tip_accounts(settings.JITO_TIP_ACCOUNTS)
         self._rate_limited_until = 0.0
         self._bundle_engine_map = {}
         self._engine_cooldown = {}  # 端点冷却时间记录 {url: 冷却结束时间戳}
+        self._blockhash_cache: tuple[float, Hash] | None = None  # (获取时间戳, blockhash)
+        self._blockhash_task: asyncio.Task | None = None
+        # 已签名 tip 交易 (Base58)：{(payer, tip 账户): b58}，仅对 _tip_tx_blockhash 有效
+        self._tip_tx_cache = {}
+        # 同一 blockhash 下 (payer, tip 账户) 已被接受的 tip 交易数，叠加到小费 lamports 上使下一笔 tip 交易签名不同
+        self._tip_tx_uses = {}
+        self._tip_tx_blockhash: Hash | None = None
+        self._http: httpx.AsyncClient | None = None
+        self._rpc: AsyncClient | None = None
+
+    async def connect(self):
+        """
+        创建长连接 HTTP 客户端。Jito block engine 支持 HTTP/2：sendBundle / 状态查询复用同一连接多路复用，
+        避免 HTTP/1.1 队头阻塞。在 connect 时才创建（main.py 在 import 之后才 patch httpx.AsyncClient 的 verify 参数）。
+        """
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(15.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        # 常驻 Solana RPC 客户端：blockhash / ALT / vote owner 查询复用同一连接池，不再每个 bundle 新建会话
+        if self._rpc is None:
+            self._rpc = AsyncClient(settings.RPC_URL, timeout=10)
+        if self._blockhash_task is None or self._blockhash_task.done():
+            self._blockhash_task = asyncio.create_task(self._refresh_blockhash())
+
+    async def _ensure_connected(self):
+        """未 connect（或已关闭）时惰性创建客户端，调用方无需先进入 async with（用完仍应 close）"""
+        if self._http is None or self._http.is_closed or self._rpc is None:
+            await self.connect()
+
+    async def close(self):
+        if self._blockhash_task is not None:
+            self._blockhash_task.cancel()
+            try:
+                await self._blockhash_task
+            except asyncio.CancelledError:
+                pass
+            self._blockhash_task = None
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+        if self._rpc is not None:
+            await self._rpc.close()
+            self._rpc = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     def _get_engine_url(self):
         """获取第一个不在冷却中的端点（按优先级顺序）"""
@@ -227,21 +327,6 @@ class JitoClient:
         # 回退到第一个端点
         return settings.JITO_ENGINE_URLS[0] if settings.JITO_ENGINE_URLS else ""
 
-    def _set_engine_cooldown(self, engine_url, retry_after=None):
-        """标记特定端点进入冷却"""
-        base_cooldown = 45
-        if retry_after:
-            try:
-                base_cooldown = max(base_cooldown, int(float(retry_after)))
-            except Exception:
-                pass
-        current = self._engine_cooldown.get(engine_url, 0)
-        now = time.time()
-        if current > now:
-            base_cooldown = int((current - now) * 2.5)
-        self._engine_cooldown[engine_url] = now + base_cooldown
-        return base_cooldown
-
     def _set_all_engines_cooldown(self, retry_after=None):
         """任一端点触发限流时，全端点一起冷却"""
         cooldown = self._set_rate_limit_cooldown(retry_after)
@@ -251,12 +336,64 @@ class JitoClient:
             self._engine_cooldown[url] = end_time
         return cooldown
 
-    @staticmethod
-    async def _post_json_rpc(engine_url: str, payload: dict, timeout: int = 10):
-        async with aiohttp.ClientSession() as session:
-            async with session.post(engine_url, json=payload, timeout=timeout) as resp:
-                data = await resp.json(content_type=None)
-                return resp.status, data, resp.headers
+    async def _post_json_rpc(self, engine_url: str, payload: dict, timeout: int = 10):
+        await self._ensure_connected()
+        resp = await self._http.post(
+            engine_url,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=timeout,
+        )
+        # 空 body / 非 JSON（如网关直接返回的 429、5xx 页面）按 data=None 返回，由调用方按 HTTP 状态码分类
+        try:
+            data = orjson.loads(resp.content) if resp.content else None
+        except orjson.JSONDecodeError:
+            data = None
+        return resp.status_code, data, resp.headers
+
+    async def _post_bundle(self, engine_url: str, payload: dict):
+        """
+        向单个端点提交 bundle，返回 (结果类型, 值)：
+        ok(bundle_id) / rate_limited(Retry-After) / blockhash / tip / vote / simulation / error
+        """
+        logger.info(f"📡 尝试使用端点: {engine_url}")
+        try:
+            status, data, headers = await self._post_json_rpc(engine_url, payload, timeout=15)
+        except Exception as e:
+            logger.error(f"❌ Jito 端点 {engine_url} 请求异常: {e}")
+            return "error", None
+
+        if status == 429:
+            logger.error(f"⚠️ 端点 {engine_url} 触发限流")
+            return "rate_limited", headers.get("Retry-After")
+
+        err = data.get("error") if isinstance(data, dict) else None
+        if err:
+            err_msg = err.get("message", err) if isinstance(err, dict) else str(err)
+            err_str = str(err_msg).lower()
+            logger.error(f"❌ Jito 端点 {engine_url} 拒绝: {err_msg}")
+            if "429" in err_str or "rate" in err_str:
+                return "rate_limited", None
+            if "blockhash" in err_str:
+                return "blockhash", None
+            # bundle 无效：区分 vote account 与 tip account（二者都含 "lock"）
+            if "tip account" in err_str or "write lock at least one tip" in err_str:
+                return "tip", None
+            if "vote" in err_str:
+                return "vote", None
+            if "simulation" in err_str:
+                return "simulation", None
+            return "error", None
+
+        if status != 200:
+            logger.error(f"❌ Jito 端点 {engine_url} HTTP {status}: {data}")
+            return "error", None
+
+        bundle_id = data.get("result") if isinstance(data, dict) else None
+        if bundle_id:
+            return "ok", bundle_id
+        logger.warning(f"⚠️ 端点 {engine_url} 返回空 bundle_id")
+        return "error", None
 
     def _set_rate_limit_cooldown(self, retry_after_header=None):
         retry_after = 0
@@ -271,109 +408,159 @@ class JitoClient:
     def get_rate_limit_wait_seconds(self) -> int:
         return max(0, int(self._rate_limited_until - time.time()))
 
-    async def send_bundle(self, jupiter_tx_base64: str, payer_keypair: Keypair, additional_txs: list = None):
+    async def _recent_blockhash(self) -> Hash:
+        """
+        取最近 blockhash；blockhash 在链上有效期约 60~90 秒，短 TTL 内复用缓存，
+        连续发 bundle 时省掉每次 get_latest_blockhash 的 RPC 往返。
+        """
+        cached = self._blockhash_cache
+        if cached is not None and time.time() - cached[0] < settings.BLOCKHASH_CACHE_TTL_SEC:
+            return cached[1]
+        await self._ensure_connected()
+        blockhash = (await self._rpc.get_latest_blockhash()).value.blockhash
+        self._blockhash_cache = (time.time(), blockhash)
+        return blockhash
+
+    async def _refresh_blockhash(self):
+        """后台定时刷新 blockhash 缓存，让 send_bundle 取 blockhash 时直接命中缓存，不在关键路径上等 RPC。"""
+        while True:
+            try:
+                blockhash = (await self._rpc.get_latest_blockhash()).value.blockhash
+                self._blockhash_cache = (time.time(), blockhash)
+            except Exception as e:
+                logger.debug(f"后台刷新 blockhash 失败: {e}")
+            await asyncio.sleep(settings.BLOCKHASH_REFRESH_INTERVAL_SEC)
+
+    def _get_tip_tx_b58(self, payer_keypair: Keypair, tip_pubkey: Pubkey, recent_blockhash: Hash) -> str:
+        """
+        构建并签名 tip 交易，返回 Base58；同一 blockhash 下按 (payer, tip 账户) 缓存，blockhash 变化时整体失效。
+        黄金规则：tip 独立一笔，仅 SystemProgram::Transfer；显式将 tip 账户标为 writable（Jito 要求 write-lock at least one tip account）
+        """
+        if self._tip_tx_blockhash != recent_blockhash:
+            self._tip_tx_cache.clear()
+            self._tip_tx_uses.clear()
+            self._tip_tx_blockhash = recent_blockhash
+        payer_pubkey = payer_keypair.pubkey()
+        cache_key = (payer_pubkey, tip_pubkey)
+        tip_b58 = self._tip_tx_cache.get(cache_key)
+        if tip_b58 is None:
+            lamports = self._tip_lamports + self._tip_tx_uses.get(cache_key, 0)
+            tip_ix = Instruction(
+                program_id=SYSTEM_PROGRAM_ID,
+                data=bytes([2, 0, 0, 0]) + lamports.to_bytes(8, "little"),  # Transfer = 2
+                accounts=[
+                    AccountMeta(payer_pubkey, is_signer=True, is_writable=True),
+                    AccountMeta(tip_pubkey, is_signer=False, is_writable=True),
+                ],
+            )
+            tip_msg = MessageV0.try_compile(payer_pubkey, [tip_ix], [], recent_blockhash)
+            tip_b58 = _b58encode(bytes(VersionedTransaction(tip_msg, [payer_keypair])))
+            self._tip_tx_cache[cache_key] = tip_b58
+        return tip_b58
+
+    def _retire_tip_tx(self, payer_pubkey: Pubkey, tip_pubkey: Pubkey):
+        """
+        bundle 被接受后作废其 tip 交易：它可能已上链，同一 blockhash 下重发会被判为重复交易导致整包失败。
+        ed25519 签名是确定性的，同一 message 重新签名得到的交易完全相同，因此下一笔 tip 多转 1 lamport 使 message 不同。
+        """
+        cache_key = (payer_pubkey, tip_pubkey)
+        self._tip_tx_cache.pop(cache_key, None)
+        self._tip_tx_uses[cache_key] = self._tip_tx_uses.get(cache_key, 0) + 1
+
+    async def send_bundle(self, jupiter_tx, payer_keypair: Keypair, additional_txs: list = None):
         """
         发送Jito Bundle，支持多个交易原子执行
-        
-        :param jupiter_tx_base64: 第一个Jupiter swap交易的base64编码
+
+        :param jupiter_tx: 第一个Jupiter swap交易（JupiterClient.get_swap_tx 返回的 SwapTx，或 base64 字符串）
         :param payer_keypair: 支付者密钥对
-        :param additional_txs: 额外的交易列表（base64编码），用于构建原子套利bundle
+        :param additional_txs: 额外的交易列表（同上），用于构建原子套利bundle
         :return: Bundle ID或错误信息
         """
+        res = await self._send_bundle_once(jupiter_tx, payer_keypair, additional_txs)
+        if res == "BLOCKHASH_EXPIRED":
+            # 缓存的 blockhash 已失效（slot 漂移），立即作废并用新 blockhash 重试一次
+            self._blockhash_cache = None
+            logger.warning("🔄 Jito 报 blockhash 无效，刷新 blockhash 后重试一次")
+            res = await self._send_bundle_once(jupiter_tx, payer_keypair, additional_txs)
+            if res == "BLOCKHASH_EXPIRED":
+                self._blockhash_cache = None
+                return None
+        return res
+
+    async def _send_bundle_once(self, jupiter_tx, payer_keypair: Keypair, additional_txs: list = None):
         try:
             wait_seconds = self.get_rate_limit_wait_seconds()
             if wait_seconds > 0:
                 logger.warning(f"⏳ Jito 全局冷却中，剩余 {wait_seconds} 秒")
                 return "RATE_LIMITED"
 
-            # 1. 取统一 blockhash，并在同一 RPC 会话内拉取 ALT、用 try_compile 重建 swap message
-            async with AsyncClient(settings.RPC_URL) as rpc_client:
-                recent_blockhash = (await rpc_client.get_latest_blockhash()).value.blockhash
+            # 1. 取统一 blockhash，并用常驻 RPC 客户端拉取 ALT、用 try_compile 重建 swap message
+            await self._ensure_connected()
+            rpc_client = self._rpc
+            recent_blockhash = await self._recent_blockhash()
 
-                signed_txs = []
+            signed_txs = []
 
-                async def _parse_and_rebuild_swap(raw_tx_bytes):
-                    tx = VersionedTransaction.from_bytes(raw_tx_bytes)
-                    new_message = await _rebuild_message_with_blockhash_async(
-                        rpc_client, tx.message, recent_blockhash
-                    )
-                    return VersionedTransaction(new_message, [payer_keypair])
-
-                try:
-                    raw_tx_bytes = base64.b64decode(jupiter_tx_base64)
-                    signed_swap_tx = await _parse_and_rebuild_swap(raw_tx_bytes)
-                    signed_txs.append(signed_swap_tx)
-                    logger.debug("✅ 第一个swap交易解析并签署成功（已统一 blockhash + try_compile）")
-                except ValueError as e:
-                    if "tx touches vote account" in str(e):
-                        logger.warning(f"⏭️ 第 1 腿触及 vote account，跳过此 bundle: {e}")
-                        return "VOTE_ACCOUNT_LOCKED"
-                    raise
-                except Exception as e:
-                    logger.error(f"❌ 解析第一个交易失败: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
-                    return None
-
-                if additional_txs:
-                    for idx, additional_tx_base64 in enumerate(additional_txs):
-                        try:
-                            additional_raw = base64.b64decode(additional_tx_base64)
-                            signed_additional_tx = await _parse_and_rebuild_swap(additional_raw)
-                            signed_txs.append(signed_additional_tx)
-                            logger.debug(f"✅ 额外交易 {idx + 1} 解析并签署成功（已统一 blockhash + try_compile）")
-                        except ValueError as e:
-                            if "tx touches vote account" in str(e):
-                                logger.warning(f"⏭️ 第 {idx + 2} 腿触及 vote account，跳过此 bundle: {e}")
-                                return "VOTE_ACCOUNT_LOCKED"
-                            raise
-                        except Exception as e:
-                            logger.error(f"❌ 解析额外交易 {idx + 1} 失败: {e}")
-                            import traceback
-                            logger.error(traceback.format_exc())
-                            return None
-
-            # 3. 构建小费交易 (Tip)，并选一个可解析的 tip 账户（避免 Invalid Base58）
-            tip_pubkey = None
-            candidates = list(settings.JITO_TIP_ACCOUNTS) or []
-            random.shuffle(candidates)
-            for raw in candidates:
-                s = (raw or "").strip().replace("\ufeff", "").replace("\r", "").replace("\n", "")
-                if not s:
-                    continue
-                try:
-                    tip_pubkey = Pubkey.from_string(s)
-                    break
-                except Exception:
-                    continue
-            if tip_pubkey is None:
-                logger.error("❌ 无有效 Jito tip 账户 (JITO_TIP_ACCOUNTS 均无法解析为 Base58)")
+            async def _parse_and_rebuild_swap(raw_tx_bytes):
+                tx = VersionedTransaction.from_bytes(raw_tx_bytes)
+                new_message = await _rebuild_message_with_blockhash_async(
+                    rpc_client, tx.message, recent_blockhash
+                )
+                return VersionedTransaction(new_message, [payer_keypair])
+
+            try:
+                raw_tx_bytes = _swap_tx_bytes(jupiter_tx)
+                signed_swap_tx = await _parse_and_rebuild_swap(raw_tx_bytes)
+                signed_txs.append(signed_swap_tx)
+                logger.debug("✅ 第一个swap交易解析并签署成功（已统一 blockhash + try_compile）")
+            except ValueError as e:
+                if "tx touches vote account" in str(e):
+                    logger.warning(f"⏭️ 第 1 腿触及 vote account，跳过此 bundle: {e}")
+                    return "VOTE_ACCOUNT_LOCKED"
+                raise
+            except Exception as e:
+                logger.error(f"❌ 解析第一个交易失败: {e}")
+                import traceback
+                logger.error(traceback.format_exc())
                 return None
-            # 黄金规则：tip 独立一笔，仅 SystemProgram::Transfer；显式将 tip 账户标为 writable（Jito 要求 write-lock at least one tip account）
-            lamports = int(self.tip_amount * 10**9)
-            tip_ix = Instruction(
-                program_id=SYSTEM_PROGRAM_ID,
-                data=bytes([2, 0, 0, 0]) + lamports.to_bytes(8, "little"),  # Transfer = 2
-                accounts=[
-                    AccountMeta(payer_keypair.pubkey(), is_signer=True, is_writable=True),
-                    AccountMeta(tip_pubkey, is_signer=False, is_writable=True),
-                ],
-            )
-            tip_msg = MessageV0.try_compile(payer_keypair.pubkey(), [tip_ix], [], recent_blockhash)
-            signed_tip_tx = VersionedTransaction(tip_msg, [payer_keypair])
-            # tip 必须是 bundle 最后一笔：[swap..., tip]
-            signed_txs.append(signed_tip_tx)
-
-            # 4.1 验证交易：确保 Vote 程序 / vote accounts 未被锁定为 writable
-            for idx, signed_tx in enumerate(signed_txs):
-                msg = getattr(signed_tx.message, "value", signed_tx.message)
-                for i, key in enumerate(msg.account_keys):
-                    if _is_vote_program(key):
-                        is_writable = msg.is_maybe_writable(i) if hasattr(msg, "is_maybe_writable") else False
-                        if is_writable:
-                            logger.error(f"❌ 交易 {idx + 1} 锁定 vote 相关账户 {key} 为 writable，拒绝发送")
+
+            if additional_txs:
+                for idx, additional_tx in enumerate(additional_txs):
+                    try:
+                        additional_raw = _swap_tx_bytes(additional_tx)
+                        signed_additional_tx = await _parse_and_rebuild_swap(additional_raw)
+                        signed_txs.append(signed_additional_tx)
+                        logger.debug(f"✅ 额外交易 {idx + 1} 解析并签署成功（已统一 blockhash + try_compile）")
+                    except ValueError as e:
+                        if "tx touches vote account" in str(e):
+                            logger.warning(f"⏭️ 第 {idx + 2} 腿触及 vote account，跳过此 bundle: {e}")
                             return "VOTE_ACCOUNT_LOCKED"
-                logger.debug(f"✅ 交易 {idx + 1} 验证通过，无 vote 相关 writable")
+                        raise
+                    except Exception as e:
+                        logger.error(f"❌ 解析额外交易 {idx + 1} 失败: {e}")
+                        import traceback
+                        logger.error(traceback.format_exc())
+                        return None
+
+            # 3. 构建小费交易 (Tip)，从启动时预解析的 tip 账户中随机选一个
+            if not self._tip_pubkeys:
+                logger.error("❌ 无有效 Jito tip 账户 (JITO_TIP_ACCOUNTS 均无法解析为 Base58)")
+                return None
+            tip_pubkey = random.choice(self._tip_pubkeys)
+            tip_b58 = self._get_tip_tx_b58(payer_keypair, tip_pubkey, recent_blockhash)
+
+            # 4.1 验证 swap 交易：确保 Vote 程序 / vote accounts 未被锁定为 writable（tip 仅 SystemProgram::Transfer，无需校验）
+            # _decompile_to_instructions 已强制 vote 相关账户 readonly，逐 key 复检仅在调试时开启
+            if settings.DEBUG_VALIDATE_VOTE_ACCOUNTS:
+                for idx, signed_tx in enumerate(signed_txs):
+                    msg = getattr(signed_tx.message, "value", signed_tx.message)
+                    for i, key in enumerate(msg.account_keys):
+                        if _is_vote_program(key):
+                            is_writable = msg.is_maybe_writable(i) if hasattr(msg, "is_maybe_writable") else False
+                            if is_writable:
+                                logger.error(f"❌ 交易 {idx + 1} 锁定 vote 相关账户 {key} 为 writable，拒绝发送")
+                                return "VOTE_ACCOUNT_LOCKED"
+                    logger.debug(f"✅ 交易 {idx + 1} 验证通过，无 vote 相关 writable")
 
             # 4.1.1 提交前硬校验：任一笔触碰 Vote 程序则直接丢弃 bundle，不提交
             for i, tx in enumerate(signed_txs):
@@ -381,70 +568,18 @@ class JitoClient:
                     logger.error(f"❌ 交易 {i} 触碰 vote program，直接丢弃 bundle，不提交")
                     return "VOTE_ACCOUNT_LOCKED"
 
-            # 4.2 安全序列化所有交易为Base58格式（Jito Bundle要求）
+            # 4.2 序列化所有交易为Base58格式（Jito Bundle要求）
+            # Base58 为纯 Python 大整数运算，放到专用线程池执行，避免阻塞事件循环上的其他协程
             try:
-                b58_txs = []
-                for idx, signed_tx in enumerate(signed_txs):
-                    try:
-                        # VersionedTransaction序列化：尝试多种方式确保正确序列化
-                        tx_bytes = None
-
-                        # 方法1：直接转换为bytes（solders的标准方式）
-                        try:
-                            tx_bytes = bytes(signed_tx)
-                            if len(tx_bytes) > 0:
-                                logger.debug(f"✅ 交易 {idx + 1} 使用方法1序列化成功，长度: {len(tx_bytes)}")
-                        except Exception as e1:
-                            logger.warning(f"⚠️ 交易 {idx + 1} 方法1序列化失败: {e1}")
-
-                            # 方法2：尝试使用serialize方法（如果存在）
-                            if hasattr(signed_tx, 'serialize'):
-                                try:
-                                    tx_bytes = signed_tx.serialize()
-                                    logger.debug(f"✅ 交易 {idx + 1} 使用方法2序列化成功，长度: {len(tx_bytes)}")
-                                except Exception as e2:
-                                    logger.warning(f"⚠️ 交易 {idx + 1} 方法2序列化失败: {e2}")
-
-                            # 方法3：尝试使用to_bytes方法（如果存在）
-                            if tx_bytes is None and hasattr(signed_tx, 'to_bytes'):
-                                try:
-                                    tx_bytes = signed_tx.to_bytes()
-                                    logger.debug(f"✅ 交易 {idx + 1} 使用方法3序列化成功，长度: {len(tx_bytes)}")
-                                except Exception as e3:
-                                    logger.warning(f"⚠️ 交易 {idx + 1} 方法3序列化失败: {e3}")
-
-                        if tx_bytes is None or len(tx_bytes) == 0:
-                            logger.error(f"❌ 交易 {idx + 1} 所有序列化方法都失败")
-                            return None
-
-                        # Base58编码（确保为 bytes，避免异常编码）
-                        try:
-                            raw = bytes(tx_bytes) if not isinstance(tx_bytes, bytes) else tx_bytes
-                            b58_tx = base58.b58encode(raw).decode("utf-8")
-                            if not b58_tx or len(b58_tx) < 100:
-                                logger.error(f"❌ 交易 {idx + 1} Base58编码结果异常，长度: {len(b58_tx)}")
-                                return None
-                            b58_txs.append(b58_tx)
-                            logger.debug(f"✅ 交易 {idx + 1} Base58编码成功，长度: {len(b58_tx)}")
-                        except Exception as e:
-                            logger.error(f"❌ 交易 {idx + 1} Base58编码失败: {type(e).__name__}: {e}")
-                            logger.error(
-                                f"   tx_bytes 长度: {len(tx_bytes) if tx_bytes else 0}, 前32字节: {tx_bytes[:32].hex() if tx_bytes and len(tx_bytes) >= 32 else 'N/A'}")
-                            import traceback
-                            logger.error(traceback.format_exc())
-                            return None
-
-                    except Exception as e:
-                        logger.error(f"❌ 交易 {idx + 1} 处理过程异常: {e}")
-                        logger.error(f"   交易类型: {type(signed_tx)}")
-                        import traceback
-                        logger.error(traceback.format_exc())
-                        return None
+                loop = asyncio.get_running_loop()
+                b58_txs = await loop.run_in_executor(_SERIALIZE_EXECUTOR, _serialize_txs, signed_txs)
             except Exception as e:
                 logger.error(f"❌ 交易序列化过程异常: {e}")
                 import traceback
                 logger.error(traceback.format_exc())
                 return None
+            # tip 必须是 bundle 最后一笔：[swap..., tip]
+            b58_txs.append(tip_b58)
 
             # 5. 构建 Bundle payload
             payload = {
@@ -454,65 +589,56 @@ class JitoClient:
                 "params": [b58_txs]  # 所有交易打包在一起，确保原子执行
             }
 
-            # 6. 按优先级尝试端点；仅对 429/限流 换端点重试，bundle 无效类错误不再发到其他端点
-            got_rate_limited = False
-            retry_after_header = None
+            # 6. 向所有未冷却端点并发提交（各区域 block engine 网络路径不同），取最先成功的 bundle_id；
+            #    全部失败时按错误类型汇总：bundle 无效类错误优先于限流
+            engine_urls = []
+            now = time.time()
             for engine_url in settings.JITO_ENGINE_URLS:
-                now = time.time()
                 cooldown_until = self._engine_cooldown.get(engine_url, 0)
                 remaining = max(0, int(cooldown_until - now + 0.5))  # 四舍五入，避免剩余 0.x 秒仍被跳过
                 if remaining > 0:
                     logger.info(f"⏳ 端点 {engine_url} 冷却中，剩余 {remaining} 秒，跳过")
                     continue
+                engine_urls.append(engine_url)
 
-                logger.info(f"📡 尝试使用端点: {engine_url}")
-                status, data, headers = await self._post_json_rpc(engine_url, payload, timeout=15)
-
-                if status == 429:
-                    logger.error(f"⚠️ 端点 {engine_url} 触发限流")
-                    got_rate_limited = True
-                    retry_after_header = retry_after_header or headers.get("Retry-After")
-                    continue
-
-                err = data.get("error") if isinstance(data, dict) else None
-                if err:
-                    err_msg = err.get("message", err) if isinstance(err, dict) else str(err)
-                    err_str = str(err_msg).lower()
-                    logger.error(f"❌ Jito 端点 {engine_url} 拒绝: {err_msg}")
-
-                    if "429" in err_str or "rate" in err_str:
-                        got_rate_limited = True
-                        continue
-                    # bundle 无效：区分 vote account 与 tip account（二者都含 "lock"）
-                    if "tip account" in err_str or "write lock at least one tip" in err_str:
-                        logger.warning("⚠️ Jito 要求 bundle 必须 write-lock 至少一个 tip 账户，检查 tip 交易是否将 tip 账户标为 writable")
-                        for i, tx in enumerate(signed_txs):
-                            msg = getattr(tx.message, "value", tx.message)
-                            logger.error(f"❌ tx[{i}] accounts: {[str(a) for a in msg.account_keys]}")
-                        return None
-                    if "vote" in err_str or ("lock" in err_str and "vote" in err_str) or "simulation" in err_str:
-                        for i, tx in enumerate(signed_txs):
-                            msg = getattr(tx.message, "value", tx.message)
-                            logger.error(f"❌ tx[{i}] accounts: {[str(a) for a in msg.account_keys]}")
-                        if "vote" in err_str or ("lock" in err_str and "vote" in err_str):
-                            return "VOTE_ACCOUNT_LOCKED"
-                        return None
-                    continue
-
-                if status != 200:
-                    logger.error(f"❌ Jito 端点 {engine_url} HTTP {status}: {data}")
-                    continue
-
-                bundle_id = data.get("result") if isinstance(data, dict) else None
-                if bundle_id:
-                    self._bundle_engine_map[bundle_id] = engine_url
-                    logger.success(f"✅ 端点 {engine_url} 成功接受Bundle! Bundle ID: {bundle_id}")
-                    return bundle_id
-
-                logger.warning(f"⚠️ 端点 {engine_url} 返回空 bundle_id")
-                continue
-
-            if got_rate_limited:
+            tasks = {asyncio.create_task(self._post_bundle(url, payload)): url for url in engine_urls}
+            pending = set(tasks)
+            outcomes = []
+            deadline = loop.time() + 15
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        logger.error(f"❌ Jito 端点提交超时: {[tasks[t] for t in pending]}")
+                        break
+                    for task in done:
+                        kind, value = task.result()
+                        if kind == "ok":
+                            engine_url = tasks[task]
+                            self._bundle_engine_map[value] = engine_url
+                            self._retire_tip_tx(payer_keypair.pubkey(), tip_pubkey)
+                            logger.success(f"✅ 端点 {engine_url} 成功接受Bundle! Bundle ID: {value}")
+                            return value
+                        outcomes.append((kind, value))
+            finally:
+                for task in pending:
+                    task.cancel()
+
+            kinds = {kind for kind, _ in outcomes}
+            # blockhash 未找到/过期：交由 send_bundle 刷新后重试
+            if "blockhash" in kinds:
+                return "BLOCKHASH_EXPIRED"
+            if kinds & {"tip", "vote", "simulation"}:
+                if "tip" in kinds:
+                    logger.warning("⚠️ Jito 要求 bundle 必须 write-lock 至少一个 tip 账户，检查 tip 交易是否将 tip 账户标为 writable")
+                for i, tx in enumerate(signed_txs):
+                    msg = getattr(tx.message, "value", tx.message)
+                    logger.error(f"❌ tx[{i}] accounts: {[str(a) for a in msg.account_keys]}")
+                return "VOTE_ACCOUNT_LOCKED" if "vote" in kinds else None
+            if "rate_limited" in kinds:
+                retry_after_header = next((v for kind, v in outcomes if kind == "rate_limited" and v), None)
                 cooldown = self._set_all_engines_cooldown(retry_after_header)
                 logger.warning(f"⏳ 全端点进入 {cooldown} 秒冷却")
                 return "RATE_LIMITED"
@@ -550,7 +676,11 @@ class JitoClient:
 
             merged = {}
 
-            status_code, data, _ = await self._post_json_rpc(engine_url, status_payload, timeout=10)
+            # 两个查询互不依赖，并发发出，轮询耗时取两者较慢者而非之和
+            (status_code, data, _), (inflight_code, inflight_data, _) = await asyncio.gather(
+                self._post_json_rpc(engine_url, status_payload, timeout=10),
+                self._post_json_rpc(engine_url, inflight_payload, timeout=10),
+            )
             if status_code == 200 and isinstance(data, dict):
                 result = data.get("result", {})
                 if isinstance(result, dict):
@@ -558,7 +688,6 @@ class JitoClient:
                     if value and isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
                         merged.update(value[0])
 
-            inflight_code, inflight_data, _ = await self._post_json_rpc(engine_url, inflight_payload, timeout=10)
             if inflight_code == 200 and isinstance(inflight_data, dict):
                 inflight_result = inflight_data.get("result", {})
                 if isinstance(inflight_result, dict):
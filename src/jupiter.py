@@ -1,12 +1,18 @@
 # src/jupiter.py
-import base64
-import itertools
+import asyncio
+import contextlib
+import time
+from urllib.parse import urlencode
 
-import aiohttp
+try:
+    import pybase64 as base64  # SIMD 加速的 base64 解码，接口与标准库一致；未安装时回退标准库
+except ImportError:
+    import base64
+
+import httpx
+import orjson
 from loguru import logger
-from solders.message import MessageV0
 from solders.pubkey import Pubkey
-from solders.transaction import VersionedTransaction
 
 from config.settings import settings
 
@@ -16,45 +22,452 @@ ATA_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8kn
 TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
 TOKEN_CLOSE_ACCOUNT_DISCRIMINATOR = 9  # SPL Token Instruction::CloseAccount
 
+# 静态扫描用的 32 字节 program id，与交易原始字节直接比较
+_ATA_PROGRAM_BYTES = bytes(ATA_PROGRAM_ID)
+_TOKEN_PROGRAM_BYTES = bytes(TOKEN_PROGRAM_ID)
+
+
+def _read_shortvec(buf: bytes, off: int) -> tuple[int, int]:
+    """读取 Solana compact-u16 (shortvec) 长度，返回 (值, 新偏移)"""
+    value = shift = 0
+    while True:
+        b = buf[off]
+        off += 1
+        value |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return value, off
+        shift += 7
+
+
+def _find_key_indexes(raw: bytes, keys_off: int, n_keys: int, key: bytes) -> list[int]:
+    """
+    在静态 account_keys 区域内查找等于 key 的下标：bytes.find 在 C 层做子串搜索，不逐个切片比较 32 字节；
+    命中位置须与 32 字节边界对齐（跨两个相邻 key 的偶然匹配跳过）。
+    """
+    out = []
+    end = keys_off + 32 * n_keys
+    pos = raw.find(key, keys_off, end)
+    while pos != -1:
+        rel = pos - keys_off
+        if rel % 32 == 0:
+            out.append(rel // 32)
+            pos = raw.find(key, pos + 32, end)
+        else:
+            pos = raw.find(key, pos + 1, end)
+    return out
+
+
+def _parse_swap_tx(raw: bytes):
+    """
+    按线格式直接解析 v0 交易的静态 account_keys 与指令，不构造 solders 对象（结果由 SwapTx.parsed 缓存）。
+    :return: (raw, 静态 account_keys 起始偏移, 静态 key 数量, 指令 tuple[(program_id_index, accounts, data)],
+        ATA 程序的静态 key 下标集合, Token 程序的静态 key 下标集合)，accounts / data 为 raw 上的 memoryview（不逐个复制 key）；
+        非 v0 交易返回 None，数据截断抛 ValueError / IndexError
+    """
+    mv = memoryview(raw)
+    n_sigs, off = _read_shortvec(raw, 0)
+    off += 64 * n_sigs
+    if raw[off] != 0x80:  # 版本前缀：0x80 | version，v0 为 0x80；legacy 无前缀
+        return None
+    off += 4  # 版本前缀 + 3 字节 header
+    n_keys, off = _read_shortvec(raw, off)
+    keys_off = off
+    if len(raw) < keys_off + 32 * n_keys:
+        raise ValueError("transaction truncated")
+    # 扫描器只关心这两类程序：先求出其静态 key 下标，指令只按下标查 set，不再逐条切片比较 32 字节；
+    # 两者都不在静态 keys 中时，任何指令都不可能命中，跳过逐条指令的 Python 解析
+    ata_indexes = frozenset(_find_key_indexes(raw, keys_off, n_keys, _ATA_PROGRAM_BYTES))
+    token_indexes = frozenset(_find_key_indexes(raw, keys_off, n_keys, _TOKEN_PROGRAM_BYTES))
+    if not ata_indexes and not token_indexes:
+        return raw, keys_off, n_keys, (), ata_indexes, token_indexes
+    off += 32 * n_keys + 32  # 静态 keys + recent_blockhash
+    n_ix, off = _read_shortvec(raw, off)
+    instructions = []
+    for _ in range(n_ix):
+        program_id_index = raw[off]
+        n_accounts, off = _read_shortvec(raw, off + 1)
+        accounts = mv[off: off + n_accounts]
+        n_data, off = _read_shortvec(raw, off + n_accounts)
+        data = mv[off: off + n_data]
+        off += n_data
+        instructions.append((program_id_index, accounts, data))
+    # 消息末尾的 address_table_lookups 也须完整：截断的交易 solders 会拒绝解析，这里同样按截断处理
+    n_lookups, off = _read_shortvec(raw, off)
+    for _ in range(n_lookups):
+        n_writable, off = _read_shortvec(raw, off + 32)
+        n_readonly, off = _read_shortvec(raw, off + n_writable)
+        off += n_readonly
+    if off > len(raw):
+        raise ValueError("transaction truncated")
+    return raw, keys_off, n_keys, tuple(instructions), ata_indexes, token_indexes
+
+
+class SwapTx:
+    """
+    Jupiter /swap 返回的交易：base64 只解码一次（.raw），字节级解析只做一次（.parsed），
+    两个 ATA 扫描器与 Jito 提交（含 blockhash 失效后的重试）共用同一份 bytes。
+    """
+    __slots__ = ("b64", "_raw", "_parsed")
+
+    def __init__(self, b64: str):
+        self.b64 = b64
+        self._raw = None
+        self._parsed = None
+
+    @property
+    def raw(self) -> bytes:
+        if self._raw is None:
+            self._raw = base64.b64decode(self.b64)
+        return self._raw
+
+    @property
+    def parsed(self):
+        """_parse_swap_tx 的结果；非 v0 交易为 None，数据截断抛 ValueError（不缓存异常）"""
+        if self._parsed is None:
+            self._parsed = (_parse_swap_tx(self.raw),)
+        return self._parsed[0]
+
+
+# 利润计算常量：启动时从 settings 读取一次，每次询价后的利润计算只用局部量
+_UNITS_PER_USDC = settings.UNITS_PER_USDC
+# 固定成本 (USDC)：Jito 小费 + Gas，按 FIXED_SOL_PRICE_USDC 折算
+_FIXED_COST_USDC = (settings.JITO_TIP_AMOUNT_SOL + settings.ESTIMATED_GAS_SOL) * settings.FIXED_SOL_PRICE_USDC
+
+
+def _profit(final_units: int, invest_units: int) -> tuple[float, float]:
+    """闭环套利利润：返回 (毛利润, 净利润)，单位 USDC"""
+    gross = (final_units - invest_units) / _UNITS_PER_USDC
+    return gross, gross - _FIXED_COST_USDC
+
+
+class QuoteBatcher:
+    """
+    询价批处理：窗口期内（默认即同一轮事件循环内）发起的 quote 请求收集为一批，整批一次性并发发出，
+    共用 JupiterClient 的长连接；批内 (inputMint, outputMint, amount) 完全相同的请求只发一次 HTTP，结果分发给所有等待者。
+    """
+
+    def __init__(self, fetch, window_sec: float = 0.0, max_batch: int = 8):
+        self._fetch = fetch  # async (input_mint, output_mint, amount) -> quote dict | None
+        self._window_sec = window_sec
+        self._max_batch = max_batch
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._inflight = set()  # 持有进行中的批次 task 引用，避免被回收
+
+    async def submit(self, input_mint, output_mint, amount):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((input_mint, output_mint, int(amount)), fut))
+        return await fut
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._inflight):
+            task.cancel()
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # 等待窗口期（0 表示只让出一轮事件循环），收集同一时刻并发发起的其他请求
+            await asyncio.sleep(self._window_sec)
+            while len(batch) < self._max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        waiters = {}
+        for key, fut in batch:
+            waiters.setdefault(key, []).append(fut)
+        keys = list(waiters)
+        results = await asyncio.gather(*[self._fetch(*k) for k in keys], return_exceptions=True)
+        for key, res in zip(keys, results):
+            for fut in waiters[key]:
+                if fut.done():  # 调用方已取消
+                    continue
+                if isinstance(res, BaseException):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+
+
+class TokenBucket:
+    """
+    令牌桶准入：每秒补充 rate 个令牌、最多累积 burst 个，每次请求消耗一个。
+    penalize 后令牌清零并降为半速（最低基准的 1/8），持续 2 倍 hold 时长后恢复基准速率。
+    """
+    __slots__ = ("rate", "burst", "tokens", "updated", "_base_rate", "_recover_at")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = self._base_rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._recover_at = 0.0
+
+    def _refill(self, now):
+        if self._recover_at and now >= self._recover_at:
+            self.rate = self._base_rate
+            self._recover_at = 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now) -> float:
+        """距下一个可用令牌的秒数，0 表示当前即可发出请求"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def penalize(self, hold_sec: float):
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0.0
+        self.rate = max(self.rate / 2, self._base_rate / 8)
+        self._recover_at = now + 2 * hold_sec
+
+
+def _parse_retry_after(value) -> float:
+    try:
+        return max(0.0, float(value)) if value else 0.0
+    except (TypeError, ValueError):
+        return 0.0  # HTTP-date 形式的 Retry-After 不解析，按指数退避处理
+
+
+class _ApiKey:
+    """API Key 池中的单个 Key：预构建的请求头、在途请求数、令牌桶与限流冷却状态"""
+    __slots__ = ("key", "quote_headers", "swap_headers", "inflight", "cooldown_until", "strikes", "bucket")
+
+    def __init__(self, key):
+        self.key = key
+        self.quote_headers = {"Accept": "application/json"}
+        if key:
+            self.quote_headers["x-api-key"] = key
+        self.swap_headers = {**self.quote_headers, "Content-Type": "application/json"}
+        self.inflight = 0
+        self.cooldown_until = 0.0
+        self.strikes = 0
+        # JUPITER_RPS <= 0 时不限速，只靠 429 冷却
+        self.bucket = TokenBucket(settings.JUPITER_RPS, settings.JUPITER_BURST) if settings.JUPITER_RPS > 0 else None
+
+    def headers(self, json_body=False):
+        """预构建的 headers，httpx 不会修改传入的 dict，可直接复用"""
+        return self.swap_headers if json_body else self.quote_headers
+
+    def rate_limited(self, retry_after=None):
+        """
+        该 Key 触发 429：按连续次数指数退避冷却（不短于 Retry-After），期间不再分配，冷却后令牌桶降速运行；
+        冷却前已发出的请求再收到 429 不重复累计
+        """
+        if time.monotonic() < self.cooldown_until:
+            return
+        self.strikes += 1
+        cooldown = min(settings.JUPITER_KEY_COOLDOWN_SEC * 2 ** (self.strikes - 1), settings.JUPITER_KEY_COOLDOWN_MAX_SEC)
+        cooldown = max(cooldown, _parse_retry_after(retry_after))
+        self.cooldown_until = time.monotonic() + cooldown
+        if self.bucket is not None:
+            self.bucket.penalize(cooldown)
+        logger.warning(f"⏳ Jupiter API Key ...{(self.key or '')[-4:]} 触发限流，冷却 {cooldown:.1f} 秒")
+
+    def server_error(self):
+        """5xx 多为服务端过载：不冷却 Key，只让令牌桶临时降速"""
+        if self.bucket is not None:
+            self.bucket.penalize(settings.JUPITER_KEY_COOLDOWN_SEC)
+
+    def ok(self):
+        self.strikes = 0
+
+
+class ApiKeyPool:
+    """
+    Jupiter API Key 池：每个 Key 限制在途请求数，分配时取空闲槽位最多的可用 Key（同等时轮询），
+    有效并发随 Key 数线性增长；配置 JUPITER_RPS 时每个 Key 另受令牌桶限速；429 的 Key 指数退避冷却。
+    全部占满、冷却或无令牌时等待释放 / 冷却结束 / 令牌补充。
+    """
+
+    def __init__(self, keys, max_inflight_per_key: int):
+        self._keys = [_ApiKey(k) for k in keys] or [_ApiKey(None)]
+        self._max_inflight = max_inflight_per_key
+        self._next = 0
+        self._released = asyncio.Event()
+
+    def _pick(self, now):
+        best = None
+        n = len(self._keys)
+        for k in range(n):
+            entry = self._keys[(self._next + k) % n]
+            if entry.cooldown_until > now or entry.inflight >= self._max_inflight:
+                continue
+            if entry.bucket is not None and entry.bucket.wait_time(now) > 0:
+                continue
+            if best is None or entry.inflight < best.inflight:
+                best = entry
+        if best is not None:
+            self._next = (self._keys.index(best) + 1) % n
+            if best.bucket is not None:
+                best.bucket.take(now)
+        return best
+
+    def _next_ready_in(self, now):
+        """最早一个 Key 冷却结束或补充出令牌的秒数；None 表示只能等在途请求释放"""
+        waits = []
+        for e in self._keys:
+            if e.cooldown_until > now:
+                waits.append(e.cooldown_until - now)
+            elif e.bucket is not None and e.inflight < self._max_inflight:
+                wait = e.bucket.wait_time(now)
+                if wait > 0:
+                    waits.append(wait)
+        return min(waits, default=None)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            entry = self._pick(now)
+            if entry is not None:
+                break
+            self._released.clear()
+            timeout = self._next_ready_in(now)
+            try:
+                await asyncio.wait_for(self._released.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        entry.inflight += 1
+        try:
+            yield entry
+        finally:
+            entry.inflight -= 1
+            self._released.set()
+
 
 class JupiterClient:
-    _key_iter = None  # 轮询用的迭代器
+    # 进程内所有 JupiterClient 共用一个 HTTP/2 客户端（一条 TLS 会话多路复用），按引用计数在最后一个实例关闭时释放
+    _shared_http: httpx.AsyncClient | None = None
+    _shared_refs = 0
+    # 全局在途请求上限：与共享客户端同生命周期，所有实例合计不超过 MAX_JUPITER_INFLIGHT，
+    # 大量并发扫描时排队，而不是一起涌向 Jupiter 触发 429 风暴
+    _shared_inflight: asyncio.Semaphore | None = None
 
     def __init__(self):
         self.api_url = settings.JUPITER_QUOTE_API
-        if JupiterClient._key_iter is None and settings.JUPITER_API_KEYS:
-            JupiterClient._key_iter = itertools.cycle(settings.JUPITER_API_KEYS)
+        # 要屏蔽的 DEX 列表：询价参数不变量，只 join 一次
+        # 🔥【修正点】必须转成字符串！不能传列表！🔥
+        self._exclude_dexes_str = ",".join([
+            "Jito",
+            "Sanctum",
+            "Stake Pool",
+            "Lido",
+            "Marinade",
+            "Socean"
+        ])
+        # 询价 URL 前缀缓存：{(input_mint, output_mint): 已编码的 URL（不含 amount 值）}，见 _quote_url
+        self._quote_url_prefixes = {}
+        self._http: httpx.AsyncClient | None = None
+        # 推测询价用：{(路径, 本金): [第 2 腿起各腿投入量 / 本金]}，取自上一轮同路径同本金的真实询价
+        self._leg_ratios = {}
+        # 路径不变量缓存：{tuple(路径): (路径, mints, 路径串)}，见 _path_spec
+        self._path_specs = {}
+        # 询价短 TTL 缓存：{(input_mint, output_mint, amount): (获取时间戳, quote)}
+        self._quote_cache = {}
+        # 缓存命中统计（仅 use_cache=True 的询价计入），scan_grid 每轮以 debug 日志输出
+        self._quote_cache_hits = 0
+        self._quote_cache_misses = 0
+        # swap 请求的 userPublicKey：启动时编码一次 Base58，不在每次 get_swap_tx 时 str(Pubkey)
+        self._user_pubkey_str = str(settings.PUB_KEY) if settings.PUB_KEY else None
+        self._quote_batcher = QuoteBatcher(
+            self._fetch_quote,
+            window_sec=settings.QUOTE_BATCH_WINDOW_MS / 1000,
+            max_batch=settings.QUOTE_BATCH_MAX,
+        )
+        self._key_pool = ApiKeyPool(settings.JUPITER_API_KEYS, settings.JUPITER_MAX_INFLIGHT_PER_KEY)
+        self._inflight_sem: asyncio.Semaphore | None = None
+
+    async def connect(self):
+        """
+        接入类级共享的长连接 HTTP/2 客户端：并发询价在同一 TCP+TLS 连接上多路复用，不再每个并发请求占一条 socket。
+        在首次 connect 时才创建（main.py 在 import 之后才 patch httpx.AsyncClient 的 verify 参数）。
+        """
+        if self._http is not None and not self._http.is_closed:
+            return
+        cls = JupiterClient
+        if cls._shared_http is None or cls._shared_http.is_closed:
+            cls._shared_http = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(
+                    max_connections=settings.MAX_JUPITER_INFLIGHT,
+                    max_keepalive_connections=settings.MAX_JUPITER_INFLIGHT,
+                ),
+            )
+            cls._shared_inflight = asyncio.Semaphore(settings.MAX_JUPITER_INFLIGHT)
+            cls._shared_refs = 0
+        cls._shared_refs += 1
+        self._http = cls._shared_http
+        self._inflight_sem = cls._shared_inflight
+
+    async def _get_http(self) -> httpx.AsyncClient:
+        """取类级共享的 HTTP 客户端；未 connect（或已关闭）时惰性创建，调用方无需先进入 async with"""
+        if self._http is None or self._http.is_closed:
+            await self.connect()
+        return self._http
 
-    def _get_headers(self):
-        headers = {"Accept": "application/json"}
-        if JupiterClient._key_iter is not None:
-            key = next(JupiterClient._key_iter)
-            if key:
-                headers["x-api-key"] = key
-        return headers
+    async def close(self):
+        await self._quote_batcher.close()
+        http, self._http = self._http, None
+        self._inflight_sem = None
+        if http is None:
+            return
+        cls = JupiterClient
+        if http is cls._shared_http:
+            cls._shared_refs -= 1
+            if cls._shared_refs > 0:
+                return
+            cls._shared_http = None
+            cls._shared_inflight = None
+        if not http.is_closed:
+            await http.aclose()
+
+    async def aclose(self):
+        """与 httpx.AsyncClient 一致的关闭接口"""
+        await self.close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     @staticmethod
-    def swap_tx_has_ata_create_or_close(swap_tx_base64: str) -> bool:
+    def swap_tx_has_ata_create_or_close(swap_tx) -> bool:
         """
         黄金规则：若交易里含 createAssociatedTokenAccount 或 closeAccount，返回 True。
-        不解析 lookup table，只检查静态 account_keys 中的 program_id。
+        不解析 lookup table，只检查静态 account_keys 中的 program_id（字节级扫描，按预先定位的 program 下标匹配）。
+        :param swap_tx: get_swap_tx 返回的 SwapTx（也接受 base64 字符串）
         """
         try:
-            raw = base64.b64decode(swap_tx_base64)
-            tx = VersionedTransaction.from_bytes(raw)
-            msg = getattr(tx.message, "value", tx.message)
-            if not isinstance(msg, MessageV0):
+            if isinstance(swap_tx, str):
+                swap_tx = SwapTx(swap_tx)
+            parsed = swap_tx.parsed
+            if parsed is None:
                 return False
-            static_keys = msg.account_keys
-            for ci in msg.instructions:
-                program_id_index = getattr(ci, "program_id_index", 0)
-                if program_id_index >= len(static_keys):
-                    continue
-                program_id = static_keys[program_id_index]
-                if program_id == ATA_PROGRAM_ID:
+            _, _, _, instructions, ata_indexes, token_indexes = parsed
+            for program_id_index, _, data in instructions:
+                if program_id_index in ata_indexes:
                     return True
-                if program_id == TOKEN_PROGRAM_ID:
-                    data = getattr(ci, "data", b"")
+                if program_id_index in token_indexes:
                     if len(data) > 0 and data[0] == TOKEN_CLOSE_ACCOUNT_DISCRIMINATOR:
                         return True
             return False
@@ -63,152 +476,354 @@ class JupiterClient:
             return False
 
     @staticmethod
-    def swap_tx_ata_create_mints(swap_tx_base64: str) -> list:
+    def swap_tx_ata_create_mints(swap_tx) -> list:
         """
         若 swap 里含 create ATA，返回被创建 ATA 对应的 mint 列表（仅用静态 keys，用于 Stage 1 检查）。
         ATA 指令 accounts 顺序：payer, ata, owner, mint → 取 accounts[3] 为 mint。
+        :param swap_tx: get_swap_tx 返回的 SwapTx（也接受 base64 字符串）
         """
         out = []
         try:
-            raw = base64.b64decode(swap_tx_base64)
-            tx = VersionedTransaction.from_bytes(raw)
-            msg = getattr(tx.message, "value", tx.message)
-            if not isinstance(msg, MessageV0):
+            if isinstance(swap_tx, str):
+                swap_tx = SwapTx(swap_tx)
+            parsed = swap_tx.parsed
+            if parsed is None:
                 return out
-            static_keys = msg.account_keys
-            for ci in msg.instructions:
-                program_id_index = getattr(ci, "program_id_index", 0)
-                if program_id_index >= len(static_keys):
-                    continue
-                if static_keys[program_id_index] != ATA_PROGRAM_ID:
+            raw, keys_off, n_keys, instructions, ata_indexes, _ = parsed
+            if not ata_indexes:
+                return out
+            for program_id_index, accounts, _ in instructions:
+                if program_id_index not in ata_indexes:
                     continue
-                accounts = getattr(ci, "accounts", b"")
                 if len(accounts) >= 4:
                     idx = accounts[3]
-                    if idx < len(static_keys):
-                        out.append(static_keys[idx])
+                    if idx < n_keys:
+                        start = keys_off + 32 * idx
+                        out.append(Pubkey.from_bytes(raw[start: start + 32]))
             return out
         except Exception as e:
             logger.debug(f"swap_tx_ata_create_mints 解析异常: {e}")
             return out
 
-    async def get_quote(self, input_mint, output_mint, amount):
-        # 1. 定义要屏蔽的 DEX 列表
-        exclude_list = [
-            "Jito",
-            "Sanctum",
-            "Stake Pool",
-            "Lido",
-            "Marinade",
-            "Socean"
-        ]
-
-        params = {
-            "inputMint": input_mint,
-            "outputMint": output_mint,
-            "amount": int(amount),
-            "slippageBps": 50,
-            # 🔥【修正点】必须转成字符串！不能传列表！🔥
-            "excludeDexes": ",".join(exclude_list)
-        }
+    async def get_quote(self, input_mint, output_mint, amount, use_cache=True):
+        """询价：经 QuoteBatcher 与同一时刻的其他询价合并为一批并发发出，相同请求只发一次。"""
+        quote, _ = await self._get_quote_cached(input_mint, output_mint, amount, use_cache)
+        return quote
+
+    async def _get_quote_cached(self, input_mint, output_mint, amount, use_cache=True):
+        """
+        带 QUOTE_CACHE_TTL_MS 短 TTL 缓存的询价：同一 slot 内链上状态基本不变，重复询价直接复用。
+        use_cache=False 时强制发请求（结果仍写入缓存），用于执行前确认。
+        :return: (quote, 是否命中缓存)
+        """
+        key = (input_mint, output_mint, int(amount))
+        ttl = settings.QUOTE_CACHE_TTL_MS / 1000
+        now = time.monotonic()
+        if use_cache and ttl > 0:
+            cached = self._quote_cache.get(key)
+            if cached is not None and now - cached[0] < ttl:
+                self._quote_cache_hits += 1
+                return cached[1], True
+            self._quote_cache_misses += 1
+
+        try:
+            quote = await asyncio.wait_for(
+                self._quote_batcher.submit(input_mint, output_mint, amount), timeout=settings.QUOTE_TIMEOUT_SEC
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"❌ 询价超时 ({settings.QUOTE_TIMEOUT_SEC} 秒): {input_mint} -> {output_mint}")
+            return None, False
+        if quote and ttl > 0:
+            cache = self._quote_cache
+            now = time.monotonic()
+            # 先删后插，dict 插入顺序即新鲜度顺序：过期或超出容量的条目总在最前面，逐个淘汰即可
+            cache.pop(key, None)
+            cache[key] = (now, quote)
+            # 先判空：QUOTE_CACHE_MAX <= 0 时会淘汰到空，空 dict 上 next(iter(...)) 会抛 StopIteration
+            while cache and (len(cache) > settings.QUOTE_CACHE_MAX or now - next(iter(cache.values()))[0] >= ttl):
+                del cache[next(iter(cache))]
+        return quote, False
 
-        async with aiohttp.ClientSession() as session:
+    def _quote_url(self, input_mint, output_mint, amount):
+        """
+        询价 URL：除 amount 外的参数按交易对只编码一次并缓存 URL 前缀，每次询价只拼接 amount，
+        不再让 httpx 逐次对 params 做 URL 编码。
+        """
+        prefix = self._quote_url_prefixes.get((input_mint, output_mint))
+        if prefix is None:
+            query = urlencode({
+                "inputMint": input_mint,
+                "outputMint": output_mint,
+                "slippageBps": 50,
+                "excludeDexes": self._exclude_dexes_str,
+            })
+            prefix = self._quote_url_prefixes[(input_mint, output_mint)] = f"{self.api_url}?{query}&amount="
+        return f"{prefix}{int(amount)}"
+
+    async def _fetch_quote(self, input_mint, output_mint, amount):
+        url = self._quote_url(input_mint, output_mint, amount)
+
+        # 网络异常 / 429 / 5xx 短暂退避后重试；429 的 Key 进入冷却，重试会分配到其他 API Key
+        for attempt in range(settings.QUOTE_MAX_ATTEMPTS):
+            retryable = attempt + 1 < settings.QUOTE_MAX_ATTEMPTS
             try:
-                # ✅ 修改点：把 headers 加进请求里
-                async with session.get(
-                        self.api_url,
-                        params=params,
-                        headers=self._get_headers()  # <--- 重点在这里
-                ) as response:
-
-                    if response.status != 200:
-                        error_msg = await response.text()
-                        logger.error(f"❌ API 报错! 状态码: {response.status}")
-                        logger.error(f"❌ 错误详情: {error_msg}")
-                        # 401 的话通常不需要打印 URL 了，因为知道是被拦了
-                        return None
-
-                    return await response.json()
+                http = await self._get_http()
+                # 先取 Key 槽位再取全局槽位：等待 Key 冷却 / 令牌补充期间不占用全局名额
+                async with self._key_pool.acquire() as api_key, self._inflight_sem:
+                    # ✅ 修改点：把 headers 加进请求里
+                    response = await http.get(
+                        url,
+                        headers=api_key.headers()  # <--- 重点在这里
+                    )
+                    if response.status_code == 429:
+                        api_key.rate_limited(response.headers.get("Retry-After"))
+                    elif response.status_code >= 500:
+                        api_key.server_error()
+                    elif response.status_code == 200:
+                        api_key.ok()
+
+                if response.status_code == 200:
+                    # orjson 直接解析响应字节，省去 httpx 的文本解码与 stdlib json 开销
+                    return orjson.loads(response.content)
+
+                if not (retryable and (response.status_code == 429 or response.status_code >= 500)):
+                    logger.error(f"❌ API 报错! 状态码: {response.status_code}")
+                    logger.error(f"❌ 错误详情: {response.text}")
+                    # 401 的话通常不需要打印 URL 了，因为知道是被拦了
+                    return None
+                logger.warning(f"⚠️ 询价 HTTP {response.status_code}，重试 ({attempt + 1}/{settings.QUOTE_MAX_ATTEMPTS - 1})")
             except Exception as e:
-                logger.error(f"❌ 网络请求异常: {e}")
-                return None
+                if not retryable:
+                    logger.error(f"❌ 网络请求异常: {e}")
+                    return None
+                logger.warning(f"⚠️ 询价网络异常: {e}，重试 ({attempt + 1}/{settings.QUOTE_MAX_ATTEMPTS - 1})")
+            await asyncio.sleep(0.2 * (attempt + 1))
+        return None
 
     async def get_swap_tx(self, quote_response):
         """
         拿着 Quote 结果，去换取 Transaction 数据
+        :return: SwapTx（swapTransaction 的 base64 及其惰性解码的 bytes），失败返回 None
         """
         payload = {
             "quoteResponse": quote_response,
-            "userPublicKey": str(settings.PUB_KEY),
+            "userPublicKey": self._user_pubkey_str,
             # 黄金规则：永远用 wSOL ATA 常驻，不在 bundle 里 wrap/unwrap
             "wrapAndUnwrapSol": False,
             "computeUnitPriceMicroLamports": 0
         }
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(
-                        settings.JUPITER_SWAP_API,
-                        json=payload,
-                        headers=self._get_headers()
-                ) as resp:
-                    if resp.status != 200:
-                        logger.error(f"❌ Swap API 报错: {await resp.text()}")
-                        return None
-                    return await resp.json()
-            except Exception as e:
-                logger.error(f"❌ Swap 请求异常: {e}")
+        try:
+            # orjson 编解码：payload 含完整 quoteResponse，响应含大段 base64 交易，stdlib json 是主要 CPU 开销
+            http = await self._get_http()
+            async with self._key_pool.acquire() as api_key, self._inflight_sem:
+                resp = await http.post(
+                    settings.JUPITER_SWAP_API,
+                    content=orjson.dumps(payload),
+                    headers=api_key.headers(json_body=True)
+                )
+                if resp.status_code == 429:
+                    api_key.rate_limited(resp.headers.get("Retry-After"))
+                elif resp.status_code >= 500:
+                    api_key.server_error()
+                elif resp.status_code == 200:
+                    api_key.ok()
+            if resp.status_code != 200:
+                logger.error(f"❌ Swap API 报错: {resp.text}")
+                return None
+            tx_b64 = orjson.loads(resp.content).get("swapTransaction")
+            if not tx_b64:
+                logger.error("❌ Swap API 响应缺少 swapTransaction")
+                return None
+            return SwapTx(tx_b64)
+        except Exception as e:
+            logger.error(f"❌ Swap 请求异常: {e}")
         return None
 
-    async def check_arb_opportunity(self, invest_amount_usdc_units):
+    async def _quote_path_sequential(self, path, mints, invest_amount_usdc_units, use_cache=True):
         """
-        按 settings.ARB_PATH 做闭环套利机会检查（首尾须为 USDC）。
-        :param invest_amount_usdc_units: 投入 USDC 数量（最小精度）
-        :return: 成功时返回 dict(quotes, final_usdc_units, gross_profit_usdc, net_profit_usdc)，失败返回 None
+        逐腿询价：下一腿投入量 = 上一腿 otherAmountThreshold，报价与真实投入量严格一致。
+        :return: (quotes, leg_inputs, final_usdc_units, exact)，exact=False 表示有腿的报价来自缓存；任一腿失败返回 None
         """
-        path = list(settings.ARB_PATH)
-        if len(path) < 2 or path[0] != "USDC" or path[-1] != "USDC":
-            logger.error("ARB_PATH 首尾必须为 USDC")
-            return None
-
-        try:
-            mints = [settings.get_mint(s) for s in path]
-        except ValueError as e:
-            logger.error(str(e))
-            return None
-
-        path_str = " -> ".join(path)
-        human_amount = invest_amount_usdc_units / settings.UNITS_PER_USDC
-        logger.info(f"🔎 开始巡逻: 投入 {human_amount} USDC, 路径: {path_str}")
-
         quotes = []
+        leg_inputs = []
         amount_in = invest_amount_usdc_units
+        exact = True
         for i in range(len(path) - 1):
             input_mint = mints[i]
             output_mint = mints[i + 1]
-            q = await self.get_quote(input_mint, output_mint, amount_in)
+            q, hit = await self._get_quote_cached(input_mint, output_mint, amount_in, use_cache)
+            exact = exact and not hit
             if not q:
                 logger.warning(f"第 {i + 1} 腿询价失败 ({path[i]} -> {path[i + 1]})")
                 return None
             quotes.append(q)
+            leg_inputs.append(amount_in)
             # amount_in = int(q["outAmount"])
             amount_in = int(q["otherAmountThreshold"])
-            logger.info(f"  --> 第 {i + 1} 步: 换得 {path[i + 1]} (raw amount: {amount_in})")
+            logger.debug("  --> 第 {} 步: 换得 {} (raw amount: {})", i + 1, path[i + 1], amount_in)
+        return quotes, leg_inputs, amount_in, exact
 
-        final_usdc_units = amount_in
-        profit_units = final_usdc_units - invest_amount_usdc_units
-        gross_profit_usdc = profit_units / settings.UNITS_PER_USDC
-        total_cost_usdc = (
-                                  settings.JITO_TIP_AMOUNT_SOL + settings.ESTIMATED_GAS_SOL
-                          ) * settings.FIXED_SOL_PRICE_USDC
-        net_profit_usdc = gross_profit_usdc - total_cost_usdc
+    async def _quote_path_speculative(self, path, mints, invest_amount_usdc_units, ratios):
+        """
+        各腿并发询价：第 2 腿起的投入量按上一轮的 (该腿投入 / 本金) 比例预估，多腿 RTT 重叠为一次。
+        预估偏差超过 SPECULATIVE_QUOTE_TOLERANCE 的腿按真实投入量重新询价；偏差内按比例缩放输出量。
+        :return: (quotes, leg_inputs, final_usdc_units, exact)，exact=False 表示有腿的报价投入量与真实值不一致或来自缓存
+        """
+        est_inputs = [invest_amount_usdc_units] + [int(invest_amount_usdc_units * r) for r in ratios]
+        results = await asyncio.gather(*[
+            self._get_quote_cached(mints[i], mints[i + 1], est_inputs[i]) for i in range(len(path) - 1)
+        ])
+        quotes = [q for q, _ in results]
 
-        logger.info(f"  --> 最终: {final_usdc_units / settings.UNITS_PER_USDC:.4f} USDC")
-        logger.info(f"📊 毛利润: ${gross_profit_usdc:.4f} USDC, 净利润: ${net_profit_usdc:.4f} USDC")
+        exact = not any(hit for _, hit in results)
+        leg_inputs = []
+        amount_in = invest_amount_usdc_units
+        for i in range(len(path) - 1):
+            q = quotes[i]
+            est = est_inputs[i]
+            if q and est != amount_in and (
+                    est <= 0 or abs(amount_in - est) / est > settings.SPECULATIVE_QUOTE_TOLERANCE):
+                logger.debug("  第 {} 腿预估投入 {} 与真实 {} 偏差过大，重新询价", i + 1, est, amount_in)
+                q, hit = await self._get_quote_cached(mints[i], mints[i + 1], amount_in)
+                exact = exact and not hit
+                quotes[i] = q
+                est = amount_in
+            if not q:
+                logger.warning(f"第 {i + 1} 腿询价失败 ({path[i]} -> {path[i + 1]})")
+                return None
+            leg_inputs.append(amount_in)
+            amount_out = int(q["otherAmountThreshold"])
+            if est != amount_in:
+                exact = False
+                amount_out = amount_out * amount_in // est
+            amount_in = amount_out
+            logger.debug("  --> 第 {} 步: 换得 {} (raw amount: {})", i + 1, path[i + 1], amount_in)
+        return quotes, leg_inputs, amount_in, exact
+
+    def _path_spec(self, path):
+        """
+        路径的不变量（tuple 路径、各代币 mint、日志用路径串）按路径缓存，每轮扫描不再重复查 settings 与拼接字符串。
+        :return: (path, mints, path_str)；路径或代币配置非法时记录错误并返回 None（不缓存，修正配置后即生效）
+        """
+        key = tuple(path)
+        spec = self._path_specs.get(key)
+        if spec is not None:
+            return spec
+        if len(key) < 2 or key[0] != "USDC" or key[-1] != "USDC":
+            logger.error("ARB_PATH 首尾必须为 USDC")
+            return None
+        try:
+            mints = tuple(settings.get_mint(s) for s in key)
+        except ValueError as e:
+            logger.error(str(e))
+            return None
+        spec = self._path_specs[key] = (key, mints, " -> ".join(key))
+        return spec
+
+    def invalidate(self):
+        """运行期修改了路径代币的 mint 配置时调用：丢弃缓存的路径不变量与依赖它们的推测比例、询价缓存"""
+        self._path_specs.clear()
+        self._leg_ratios.clear()
+        self._quote_cache.clear()
+
+    async def check_arb_opportunity(self, invest_amount_usdc_units, min_profit_usdc=None, path=None):
+        """
+        按给定路径（默认 settings.ARB_PATH）做闭环套利机会检查（首尾须为 USDC）。
+        有上一轮同本金的各腿比例时并发询价（推测执行），询价可命中短 TTL 缓存；推测/缓存结果显示有利润时
+        再绕过缓存逐腿精确确认，保证返回的 quotes 为最新报价且投入量与上一腿产出严格衔接。
+        :param invest_amount_usdc_units: 投入 USDC 数量（最小精度）
+        :param min_profit_usdc: 最低净利润门槛，默认 settings.MIN_NET_PROFIT_USDC；未超过门槛直接返回 None，
+            调用方无需再为亏损路径请求 /swap
+        :param path: 代币符号路径，默认 settings.ARB_PATH
+        :return: 有套利机会时返回 dict(quotes, path, invest_usdc_units, final_usdc_units, gross_profit_usdc, net_profit_usdc)，
+            利润不足或询价失败返回 None
+        """
+        if min_profit_usdc is None:
+            min_profit_usdc = settings.MIN_NET_PROFIT_USDC
+        spec = self._path_spec(path or settings.ARB_PATH)
+        if spec is None:
+            return None
+        path, mints, path_str = spec
+
+        # 每轮扫描的过程日志用 debug + lazy：默认 INFO 级别下不做字符串拼接与除法
+        logger.opt(lazy=True).debug(
+            "🔎 开始巡逻: 投入 {amt} USDC, 路径: {path}",
+            amt=lambda: invest_amount_usdc_units / _UNITS_PER_USDC,
+            path=lambda: path_str,
+        )
+
+        ratio_key = (path, invest_amount_usdc_units)
+        ratios = self._leg_ratios.get(ratio_key)
+        if ratios and len(ratios) == len(path) - 2:
+            res = await self._quote_path_speculative(path, mints, invest_amount_usdc_units, ratios)
+        else:
+            res = await self._quote_path_sequential(path, mints, invest_amount_usdc_units)
+        if res is None:
+            return None
+        quotes, leg_inputs, final_usdc_units, exact = res
+
+        _, est_net_profit_usdc = _profit(final_usdc_units, invest_amount_usdc_units)
+        if not exact and est_net_profit_usdc > min_profit_usdc:
+            logger.info("🎯 推测/缓存报价显示有利润，按真实投入量逐腿确认最新报价...")
+            res = await self._quote_path_sequential(path, mints, invest_amount_usdc_units, use_cache=False)
+            if res is None:
+                return None
+            quotes, leg_inputs, final_usdc_units, exact = res
+
+        self._leg_ratios[ratio_key] = [a / invest_amount_usdc_units for a in leg_inputs[1:]]
+
+        gross_profit_usdc, net_profit_usdc = _profit(final_usdc_units, invest_amount_usdc_units)
+
+        logger.opt(lazy=True).debug(
+            "  --> 最终: {final:.4f} USDC", final=lambda: final_usdc_units / _UNITS_PER_USDC
+        )
+        logger.debug("📊 毛利润: ${:.4f} USDC, 净利润: ${:.4f} USDC", gross_profit_usdc, net_profit_usdc)
+
+        if net_profit_usdc <= min_profit_usdc:
+            logger.debug("📉 利润不足，继续扫描... (净利润: ${:.4f} <= ${})", net_profit_usdc, min_profit_usdc)
+            return None
 
         return {
             "quotes": quotes,
+            "path": list(path),
+            "invest_usdc_units": invest_amount_usdc_units,
             "final_usdc_units": final_usdc_units,
             "gross_profit_usdc": gross_profit_usdc,
             "net_profit_usdc": net_profit_usdc,
         }
+
+    async def scan_many(self, candidates, min_profit_usdc=None):
+        """
+        一次并发检查多组 (投入金额, 路径) 候选；总并发受全局在途上限与各 API Key 槽位约束，不会超出限流。
+        :param candidates: [(投入 USDC 数量（最小精度）, 路径), ...]
+        :return: 与 candidates 一一对应的 check_arb_opportunity 结果，无机会或检查异常为 None
+        """
+        results = await asyncio.gather(
+            *[self.check_arb_opportunity(size, min_profit_usdc, path) for size, path in candidates],
+            return_exceptions=True,
+        )
+        for i, ((size, path), res) in enumerate(zip(candidates, results)):
+            if isinstance(res, Exception):
+                logger.error(f"❌ 投入 {size / settings.UNITS_PER_USDC} USDC ({' -> '.join(path or settings.ARB_PATH)}) 检查异常: {res}")
+                results[i] = None
+        return results
+
+    async def scan_grid(self, sizes, min_profit_usdc=None, paths=None):
+        """
+        多个投入金额 × 多条路径并发检查套利机会（利润随规模非线性变化），扫描耗时取决于最慢的一组而非总和；
+        各组询价共用同一 HTTP/2 连接与询价批处理。
+        :param sizes: 投入 USDC 数量列表（最小精度）
+        :param paths: 路径列表，默认只扫描 settings.ARB_PATH
+        :return: 净利润最高的 check_arb_opportunity 结果，均无机会返回 None
+        """
+        candidates = [(size, path) for path in (paths or [settings.ARB_PATH]) for size in sizes]
+        hits, misses = self._quote_cache_hits, self._quote_cache_misses
+        best = None
+        for res in await self.scan_many(candidates, min_profit_usdc):
+            if res and (best is None or res["net_profit_usdc"] > best["net_profit_usdc"]):
+                best = res
+        logger.debug(
+            "🗂️ 本轮询价缓存: 命中 {} / 未命中 {}", self._quote_cache_hits - hits, self._quote_cache_misses - misses
+        )
+        return best
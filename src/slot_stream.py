@@ -0,0 +1,99 @@
+# src/slot_stream.py
+"""
+slot 驱动扫描：通过 Solana WebSocket slotSubscribe 接收新 slot 推送，新 slot 开始（价格更新）时才触发扫描，
+替代固定间隔轮询。扫描比出块慢时只取最新 slot（中间 slot 合并），不会积压。
+"""
+import asyncio
+import time
+
+from loguru import logger
+from solana.rpc.websocket_api import connect
+
+
+class SolanaSlotStream:
+    """
+    用法：
+        async with SolanaSlotStream(settings.WSS_URL) as stream:
+            async for slot in stream:
+                ...
+    后台任务持续接收 slot 推送并断线重连；迭代时等待比上次更新的 slot。
+    """
+
+    def __init__(self, wss_url: str, min_interval_sec: float = 0.0, max_wait_sec: float = 20.0):
+        """
+        :param wss_url: Solana RPC WebSocket 地址
+        :param min_interval_sec: 两次返回之间的最小间隔，避免按 ~400ms 出块频率打满 Jupiter 限流
+        :param max_wait_sec: 超过该时间无新 slot（推送断开）也返回，退化为按该间隔轮询
+        """
+        self.wss_url = wss_url
+        self.min_interval_sec = min_interval_sec
+        self.max_wait_sec = max_wait_sec
+        self._latest_slot: int | None = None
+        self._yielded_slot: int | None = None
+        self._last_yield = 0.0
+        self._new_slot = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.next_slot()
+
+    async def next_slot(self) -> int | None:
+        """等待下一个新 slot；推送中断超过 max_wait_sec 时返回当前已知的最新 slot（可能为 None）"""
+        wait = self._last_yield + self.min_interval_sec - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if self._latest_slot is None or self._latest_slot == self._yielded_slot:
+            self._new_slot.clear()
+            try:
+                await asyncio.wait_for(self._new_slot.wait(), timeout=self.max_wait_sec)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ {self.max_wait_sec} 秒未收到新 slot，按轮询继续扫描")
+        self._yielded_slot = self._latest_slot
+        self._last_yield = time.monotonic()
+        return self._yielded_slot
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            try:
+                async with connect(self.wss_url) as ws:
+                    await ws.slot_subscribe()
+                    logger.info(f"📡 已订阅 slot 推送: {self.wss_url}")
+                    backoff = 1
+                    async for msgs in ws:
+                        for msg in msgs:
+                            # 订阅确认的 result 为订阅 ID (int)，slot 通知的 result 为 SlotInfo
+                            slot = getattr(getattr(msg, "result", None), "slot", None)
+                            if slot is not None and (self._latest_slot is None or slot > self._latest_slot):
+                                self._latest_slot = slot
+                                self._new_slot.set()
+                logger.warning(f"⚠️ slot 推送连接被关闭，{backoff} 秒后重连")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ slot 订阅异常: {e}，{backoff} 秒后重连")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Base58 编码测试（离线，无需网络）
+jito_client._b58encode 按 58^80 分块做大整数除法；这里与逐位 divmod(58) 的教科书实现逐例对照。
+"""
+
+import os
+import random
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.jito_client import _b58encode
+
+_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _reference_b58encode(data: bytes) -> str:
+    """逐位 divmod(58)，前导 0 字节编码为 '1'"""
+    n = int.from_bytes(data, "big")
+    out = []
+    while n:
+        n, r = divmod(n, 58)
+        out.append(_ALPHABET[r])
+    n_zeros = len(data) - len(data.lstrip(b"\0"))
+    return "1" * n_zeros + "".join(reversed(out))
+
+
+def test_b58encode():
+    """分块编码与参考实现逐例一致：0~69 字节、交易大小（300 / 1232 / 1500 字节），含前导 0 与全 0 输入"""
+    print("\n🔤 测试 Base58 编码...")
+    rng = random.Random(58)
+    cases = []
+    for n in list(range(70)) + [300, 1232, 1500]:
+        cases.append(bytes(rng.getrandbits(8) for _ in range(n)))
+        cases.append(bytes(n))  # 全 0
+        if n > 1:
+            zeros = rng.randint(1, n - 1)
+            cases.append(bytes(zeros) + bytes(rng.getrandbits(8) | 1 for _ in range(n - zeros)))
+            cases.append(b"\xff" * n)
+
+    mismatches = 0
+    for data in cases:
+        expected = _reference_b58encode(data)
+        actual = _b58encode(data)
+        if actual != expected:
+            mismatches += 1
+            print(f"   ❌ {len(data)} 字节 {data[:8].hex()}...: 预期={expected[:20]}..., 实际={actual[:20]}...")
+
+    if mismatches:
+        print(f"❌ Base58 编码与参考实现不一致: {mismatches}/{len(cases)} 例")
+        return False
+    print(f"✅ Base58 编码与参考实现一致: {len(cases)} 例")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_b58encode() else 1)
@@ -136,14 +136,14 @@ async def test_jupiter_api():
         print("⚠️  跳过Jupiter API测试（未配置API Key）")
         return True
 
-    jupiter_client = JupiterClient()
     try:
         # 尝试获取一个小的USDC->SOL报价（1 USDC）
-        quote = await jupiter_client.get_quote(
-            settings.USDC_MINT,
-            settings.SOL_MINT,
-            1_000_000  # 1 USDC (6 decimals)
-        )
+        async with JupiterClient() as jupiter_client:
+            quote = await jupiter_client.get_quote(
+                settings.USDC_MINT,
+                settings.SOL_MINT,
+                1_000_000  # 1 USDC (6 decimals)
+            )
         if quote:
             print(f"✅ Jupiter API连接成功")
             print(f"   1 USDC ≈ {int(quote['outAmount']) / settings.LAMPORT_PER_SOL:.6f} SOL")
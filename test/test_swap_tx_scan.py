@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+swap 交易 ATA / closeAccount 扫描器等价性测试（离线，无需网络）
+JupiterClient 的扫描器按线格式直接解析交易字节；这里用 solders 完整反序列化的参考实现逐例对照，
+覆盖完整交易、任意位置截断的交易、legacy 交易与非法输入。
+"""
+
+import base64
+import os
+import random
+import sys
+
+from loguru import logger
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.hash import Hash
+from solders.instruction import Instruction, AccountMeta
+from solders.keypair import Keypair
+from solders.message import Message, MessageV0
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.jupiter import JupiterClient, SwapTx, ATA_PROGRAM_ID, TOKEN_PROGRAM_ID, TOKEN_CLOSE_ACCOUNT_DISCRIMINATOR
+
+SYSTEM_PROGRAM_ID = Pubkey.from_string("11111111111111111111111111111111")
+N_TXS = 1500
+
+
+def _reference_scan(raw: bytes):
+    """参考实现：solders 反序列化后按静态 account_keys 检查（字节级扫描器替换前的逻辑）"""
+    try:
+        tx = VersionedTransaction.from_bytes(raw)
+    except Exception:
+        return False, []
+    msg = getattr(tx.message, "value", tx.message)
+    if not isinstance(msg, MessageV0):
+        return False, []
+    static_keys = msg.account_keys
+    has, mints = False, []
+    for ci in msg.instructions:
+        if ci.program_id_index >= len(static_keys):
+            continue
+        program_id = static_keys[ci.program_id_index]
+        if program_id == ATA_PROGRAM_ID:
+            has = True
+            if len(ci.accounts) >= 4 and ci.accounts[3] < len(static_keys):
+                mints.append(static_keys[ci.accounts[3]])
+        elif program_id == TOKEN_PROGRAM_ID and ci.data and ci.data[0] == TOKEN_CLOSE_ACCOUNT_DISCRIMINATOR:
+            has = True
+    return has, mints
+
+
+def _make_tx(rng: random.Random, payer: Keypair) -> bytes:
+    """随机构造一笔 v0 交易：普通 swap 指令 + 可选的 create ATA / closeAccount / token transfer，可选 ALT"""
+    owner = payer.pubkey()
+    accounts = [Pubkey.new_unique() for _ in range(rng.randint(0, 24))]
+    ixs = [Instruction(
+        Pubkey.new_unique(),
+        bytes(rng.getrandbits(8) for _ in range(rng.randint(0, 40))),
+        [AccountMeta(owner, True, True)] + [AccountMeta(a, False, rng.random() < 0.5) for a in accounts],
+    )]
+    kind = rng.choice(["swap", "ata", "close", "transfer", "ata_close"])
+    if kind in ("ata", "ata_close"):
+        ixs.insert(0, Instruction(ATA_PROGRAM_ID, b"\x01", [
+            AccountMeta(owner, True, True),
+            AccountMeta(Pubkey.new_unique(), False, True),
+            AccountMeta(owner, False, False),
+            AccountMeta(Pubkey.new_unique(), False, False),
+            AccountMeta(SYSTEM_PROGRAM_ID, False, False),
+            AccountMeta(TOKEN_PROGRAM_ID, False, False),
+        ]))
+    if kind in ("close", "ata_close"):
+        ixs.append(Instruction(TOKEN_PROGRAM_ID, bytes([TOKEN_CLOSE_ACCOUNT_DISCRIMINATOR]),
+                               [AccountMeta(Pubkey.new_unique(), False, True), AccountMeta(owner, True, True)]))
+    if kind == "transfer":
+        ixs.append(Instruction(TOKEN_PROGRAM_ID, bytes([3]) + bytes(8),
+                               [AccountMeta(Pubkey.new_unique(), False, True), AccountMeta(owner, True, True)]))
+    # ALT 收录部分普通账户，使交易末尾带 address_table_lookups
+    lookup_tables = []
+    for _ in range(rng.randint(0, 2)):
+        if accounts:
+            lookup_tables.append(AddressLookupTableAccount(Pubkey.new_unique(), rng.sample(accounts, rng.randint(1, len(accounts)))))
+    msg = MessageV0.try_compile(owner, ixs, lookup_tables, Hash.new_unique())
+    return bytes(VersionedTransaction(msg, [payer]))
+
+
+def _scan(swap_tx):
+    return (JupiterClient.swap_tx_has_ata_create_or_close(swap_tx),
+            JupiterClient.swap_tx_ata_create_mints(swap_tx))
+
+
+def test_swap_tx_scan_equivalence():
+    """字节级扫描器与 solders 参考实现逐例一致"""
+    print("\n🧪 测试 swap 交易扫描器等价性...")
+    rng = random.Random(20260215)
+    payer = Keypair.from_seed(bytes(range(32)))
+
+    cases = []
+    for _ in range(N_TXS):
+        raw = _make_tx(rng, payer)
+        cases.append(("完整", raw))
+        cases.append(("截断", raw[:rng.randrange(len(raw))]))
+    legacy = VersionedTransaction(Message.new_with_blockhash(
+        [Instruction(ATA_PROGRAM_ID, b"", [AccountMeta(payer.pubkey(), True, True)])], payer.pubkey(), Hash.new_unique()
+    ), [payer])
+    cases.append(("legacy", bytes(legacy)))
+    cases += [("随机字节", bytes(rng.getrandbits(8) for _ in range(n))) for n in (0, 1, 65, 300)]
+
+    mismatches = 0
+    for label, raw in cases:
+        expected = _reference_scan(raw)
+        b64 = base64.b64encode(raw).decode()
+        for swap_tx in (SwapTx(b64), b64):
+            actual = _scan(swap_tx)
+            if actual != expected:
+                mismatches += 1
+                print(f"   ❌ {label} ({len(raw)} 字节): 预期={expected}, 实际={actual}")
+                break
+    positives = sum(1 for _, raw in cases if _reference_scan(raw)[0])
+
+    if mismatches:
+        print(f"❌ 扫描器与参考实现不一致: {mismatches}/{len(cases)} 例")
+        return False
+    print(f"✅ 扫描器与参考实现一致: {len(cases)} 例（{positives} 例含 create ATA / closeAccount）")
+    return True
+
+
+if __name__ == "__main__":
+    logger.remove()  # 扫描器的解析异常 debug 日志在此无关
+    sys.exit(0 if test_swap_tx_scan_equivalence() else 1)